@@ -0,0 +1,79 @@
+import time
+
+
+def ease_out(progress):
+    return 1 - (1 - progress) ** 3
+
+
+class Tween:
+    def __init__(self, start, end, started, duration):
+        self.start = start
+        self.end = end
+        self.started = started
+        self.duration = duration
+
+    def position(self, now):
+        progress = min(1.0, (now - self.started) / self.duration)
+        eased = ease_out(progress)
+        x1, y1 = self.start
+        x2, y2 = self.end
+        return x1 + (x2 - x1) * eased, y1 + (y2 - y1) * eased, progress >= 1.0
+
+
+class Animator:
+    # moves canvas items along tweens from one after() tick shared by every
+    # running animation; each tick sets the coords of all moving items in
+    # one go and Tk redraws them together once the callback returns
+
+    def __init__(self, canvas, fps=60, duration=0.12, reduce_motion=False):
+        self.canvas = canvas
+        self.interval = max(1, round(1000 / fps))
+        self.duration = duration
+        self.reduce_motion = reduce_motion
+        self.tweens = {}
+        self.job = None
+
+    @property
+    def busy(self):
+        return bool(self.tweens)
+
+    def move(self, item, x, y, duration=None):
+        # slides item to (x, y); an item that is already moving turns
+        # towards the new target from where it is now
+        duration = self.duration if duration is None else duration
+        self.tweens.pop(item, None)
+        coords = self.canvas.coords(item)
+        if self.reduce_motion or duration <= 0 or not coords or tuple(coords[:2]) == (x, y):
+            self.canvas.coords(item, x, y)
+            return
+        self.tweens[item] = Tween(tuple(coords[:2]), (x, y), time.monotonic(), duration)
+        if self.job is None:
+            self.job = self.canvas.after(self.interval, self.tick)
+
+    def tick(self):
+        now = time.monotonic()
+        for item, tween in list(self.tweens.items()):
+            x, y, done = tween.position(now)
+            self.canvas.coords(item, x, y)
+            if done:
+                del self.tweens[item]
+        self.job = self.canvas.after(self.interval, self.tick) if self.tweens else None
+
+    def finish(self, *items):
+        # snaps the given items, or all of them, to where they are going
+        for item in items or list(self.tweens):
+            tween = self.tweens.pop(item, None)
+            if tween is not None:
+                self.canvas.coords(item, *tween.end)
+        self.stop_ticking()
+
+    def cancel(self):
+        # drops every running animation where it is, e.g. before the items
+        # are deleted
+        self.tweens = {}
+        self.stop_ticking()
+
+    def stop_ticking(self):
+        if self.job is not None and not self.tweens:
+            self.canvas.after_cancel(self.job)
+            self.job = None
@@ -0,0 +1,135 @@
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageTk
+
+from atlas import Atlas, write_atlas
+from engine import CARD_NAMES, DECK, SUITS
+
+BACKS = ("dark_back", "light_back")
+SLOTS = ("empty_slot",) + tuple(f"ace_of_{suit}_slot" for suit in SUITS)
+ICONS = ("new_game", "restart_game", "undo", "redo", "hint", "send", "settings", "maximize", "minimize")
+FACES = tuple(os.path.join("cards", CARD_NAMES[card]) for card in DECK)
+# what `python asset_manager.py` packs into the atlas
+ATLAS_NAMES = BACKS + SLOTS + FACES
+ATLAS_FILE = "atlas.bin"
+
+
+def face_name(card):
+    return FACES[card]
+
+
+class AssetManager:
+    # PNGs are decoded on a thread pool, but PhotoImages may only be made on
+    # the Tk thread, so finished decodes are picked up from the event loop.
+    # every image is read from disk once and kept for the life of the window.
+    # images packed in the atlas are cut from it instead of decoding PNGs.
+    # copies at other sizes live in an LRU of cache_size entries; it has to
+    # hold at least two full sets, as an evicted image vanishes from the
+    # canvas, and a relayout re-requests every image on screen
+
+    def __init__(self, root, directory="assets", workers=None, cache_size=256):
+        self.root = root
+        self.directory = directory
+        self.atlas = Atlas(os.path.join(directory, ATLAS_FILE), directory)
+        self.executor = ThreadPoolExecutor(workers or min(4, os.cpu_count() or 1))
+        self.decoding = {}
+        self.images = {}
+        self.photos = {}
+        self.scaled = OrderedDict()
+        self.cache_size = cache_size
+        self.job = None
+
+    def decode(self, name):
+        image = self.atlas.image(name)
+        if image is None:
+            image = Image.open(os.path.join(self.directory, name + ".png"))
+            image.load()
+        return image
+
+    def prefetch(self, names):
+        # queues names for decoding in the given order
+        for name in names:
+            if name not in self.decoding and name not in self.photos:
+                self.decoding[name] = self.executor.submit(self.decode, name)
+        if self.decoding and self.job is None:
+            self.job = self.root.after(10, self.install)
+
+    def get(self, name, size=None):
+        # the PhotoImage of name, resized to size if one is given, waiting
+        # for its decode if it is not done yet
+        if name not in self.photos:
+            self.prefetch([name])
+            self.finish(name)
+        if size is None or size == self.images[name].size:
+            return self.photos[name]
+        key = name, size
+        photo = self.scaled.get(key)
+        if photo is None:
+            photo = self.scaled[key] = ImageTk.PhotoImage(self.images[name].resize(size, Image.LANCZOS))
+            if len(self.scaled) > self.cache_size:
+                self.scaled.popitem(last=False)
+        else:
+            self.scaled.move_to_end(key)
+        return photo
+
+    def finish(self, name):
+        image = self.images[name] = self.decoding.pop(name).result()
+        self.photos[name] = ImageTk.PhotoImage(image)
+
+    def install(self):
+        self.job = None
+        for name, future in list(self.decoding.items()):
+            if future.done():
+                self.finish(name)
+        if self.decoding:
+            self.job = self.root.after(10, self.install)
+
+    def stop(self):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class OverlayCache:
+    # translucent highlight rectangles, one PhotoImage per (width, height,
+    # colour, alpha) shared by every overlay of that shape. at most a few
+    # overlays are on the canvas at once and they are always the most
+    # recently used, so evicting the oldest never blanks a visible one
+
+    def __init__(self, root, size=64):
+        self.root = root
+        self.size = size
+        self.images = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, width, height, fill, alpha):
+        key = width, height, fill, alpha
+        photo = self.images.get(key)
+        if photo is not None:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return photo
+        self.misses += 1
+        rgba = self.root.winfo_rgb(fill) + (alpha,)
+        photo = self.images[key] = ImageTk.PhotoImage(Image.new("RGBA", (width, height), rgba))
+        if len(self.images) > self.size:
+            self.images.popitem(last=False)
+        return photo
+
+    def __repr__(self):
+        return f"OverlayCache({len(self.images)}/{self.size} images, {self.hits} hits, {self.misses} misses)"
+
+
+def main(directory="assets"):
+    # the build step: packs backs, slots and faces into the atlas
+    count = write_atlas(os.path.join(directory, ATLAS_FILE), directory, ATLAS_NAMES)
+    print(f"{count} images packed into {os.path.join(directory, ATLAS_FILE)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import json
+import mmap
+import os
+import struct
+
+from PIL import Image
+
+# one file holding many images as raw RGBA pixels: MAGIC, the length of the
+# JSON index as a little-endian uint32, the index, then the pixels. the
+# index maps a name to [offset, width, height, mtime_ns, size], with the
+# offset counted from the end of the index and the last two taken from the
+# PNG the pixels came from
+
+MAGIC = b"KLATLAS1"
+
+
+def write_atlas(path, directory, names):
+    entries = {}
+    chunks = []
+    offset = 0
+    for name in names:
+        source = os.path.join(directory, name + ".png")
+        stat = os.stat(source)
+        with Image.open(source) as image:
+            pixels = image.convert("RGBA")
+        entries[name] = [offset, pixels.width, pixels.height, stat.st_mtime_ns, stat.st_size]
+        chunks.append(pixels.tobytes())
+        offset += len(chunks[-1])
+    index = json.dumps(entries, separators=(",", ":")).encode("utf-8")
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(MAGIC + struct.pack("<I", len(index)) + index)
+        for chunk in chunks:
+            handle.write(chunk)
+    os.replace(temp_path, path)
+    return len(entries)
+
+
+class Atlas:
+    # read-only view of an atlas file. images are cut straight from the
+    # memory map without decoding anything; an entry whose PNG has changed
+    # since the build is stale and not served, so the caller falls back to
+    # the PNG
+
+    def __init__(self, path, directory):
+        self.directory = directory
+        self.entries = {}
+        self.map = None
+        try:
+            with open(path, "rb") as handle:
+                self.map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.map[:len(MAGIC)] != MAGIC:
+                raise ValueError("not an atlas")
+            length, = struct.unpack_from("<I", self.map, len(MAGIC))
+            start = len(MAGIC) + 4
+            self.entries = json.loads(self.map[start:start + length].decode("utf-8"))
+            self.base = start + length
+        except (OSError, ValueError, struct.error):
+            # a missing, empty or broken atlas just serves nothing
+            self.entries = {}
+
+    def image(self, name):
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        offset, width, height, mtime, size = entry
+        try:
+            stat = os.stat(os.path.join(self.directory, name + ".png"))
+        except OSError:
+            stat = None
+        if stat is not None and (stat.st_mtime_ns, stat.st_size) != (mtime, size):
+            return None
+        start = self.base + offset
+        pixels = memoryview(self.map)[start:start + width * height * 4]
+        return Image.frombuffer("RGBA", (width, height), pixels, "raw", "RGBA", 0, 1)
@@ -0,0 +1,95 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from engine import KlondikeGame, shuffled_deck
+from solver import solve
+
+FIELDS = ["seed", "outcome", "nodes", "time", "moves"]
+
+
+def solve_seeds(seeds, total_redeals, max_nodes, time_limit):
+    results = []
+    for seed in seeds:
+        game = KlondikeGame(shuffled_deck(seed), total_redeals=total_redeals)
+        result = solve(game, max_nodes, time_limit)
+        results.append({"seed": seed, "outcome": result.outcome, "nodes": result.nodes,
+                        "time": round(result.elapsed, 4), "moves": len(result.moves)})
+    return results
+
+
+class JsonlSink:
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, row):
+        self.file.write(json.dumps(row) + "\n")
+
+
+class CsvSink:
+    def __init__(self, file):
+        self.writer = csv.DictWriter(file, FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+
+def run(seeds, sink, workers=None, chunk_size=8, total_redeals=3, max_nodes=200000, time_limit=10.0):
+    # only a few chunks per worker are in flight at once, so memory stays
+    # flat however long the seed range is
+    workers = workers or os.cpu_count() or 1
+    window = workers * 4
+    seeds = iter(seeds)
+    pending = set()
+    counts = {}
+    with ProcessPoolExecutor(workers) as pool:
+        while True:
+            while len(pending) < window:
+                chunk = list(islice(seeds, chunk_size))
+                if not chunk:
+                    break
+                pending.add(pool.submit(solve_seeds, chunk, total_redeals, max_nodes, time_limit))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for row in future.result():
+                    sink.write(row)
+                    counts[row["outcome"]] = counts.get(row["outcome"], 0) + 1
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a range of seeded Klondike deals.")
+    parser.add_argument("--start", type=int, default=0, help="first seed")
+    parser.add_argument("--count", type=int, default=1000, help="number of deals")
+    parser.add_argument("--redeals", default="3", help='redeals per game or "unlimited"')
+    parser.add_argument("--max-nodes", type=int, default=200000)
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per core")
+    parser.add_argument("--chunk-size", type=int, default=8, help="deals per task")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--output", default="-", help='output file, "-" for stdout')
+    args = parser.parse_args(argv)
+
+    total_redeals = None if args.redeals == "unlimited" else int(args.redeals)
+    seeds = range(args.start, args.start + args.count)
+    file = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        sink = (CsvSink if args.format == "csv" else JsonlSink)(file)
+        counts = run(seeds, sink, args.workers, args.chunk_size, total_redeals, args.max_nodes, args.time_limit)
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    total = sum(counts.values())
+    summary = ", ".join(f"{outcome}: {count}" for outcome, count in sorted(counts.items()))
+    print(f"{total} deals ({summary})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from asset_manager import ATLAS_FILE, ATLAS_NAMES
+from atlas import Atlas, write_atlas
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+
+def from_pngs():
+    for name in ATLAS_NAMES:
+        image = Image.open(os.path.join(DIRECTORY, name + ".png"))
+        image.load()
+
+
+def from_atlas():
+    atlas = Atlas(os.path.join(DIRECTORY, ATLAS_FILE), DIRECTORY)
+    for name in ATLAS_NAMES:
+        atlas.image(name).load()
+
+
+def main():
+    path = os.path.join(DIRECTORY, ATLAS_FILE)
+    if not os.path.exists(path):
+        write_atlas(path, DIRECTORY, ATLAS_NAMES)
+    results = {}
+    for name, func in (("loose PNGs", from_pngs), ("atlas", from_atlas)):
+        best = min(timeit.repeat(func, number=5, repeat=5)) / 5
+        results[name] = best
+        print(f"{name:>12}: {best * 1000:8.2f} ms for {len(ATLAS_NAMES)} images")
+    print(f"{'speedup':>12}: {results['loose PNGs'] / results['atlas']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
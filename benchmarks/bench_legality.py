@@ -0,0 +1,87 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import CARD_NAMES, DECK, FOUNDATION_MOVES, TABLEAU_MOVES
+
+
+def check_move_validity(current_card, last_card, ace_slot):
+    # SolitareGameFrame.check_move_validity before the move tables
+    card_values = {
+        "j": "11",
+        "q": "12",
+        "k": "13",
+        "a": "1"
+    }
+    if ace_slot:
+        if "clubs" in current_card and "clubs" not in last_card:
+            return False
+        if "spades" in current_card and "spades" not in last_card:
+            return False
+        if "diamonds" in current_card and "diamonds" not in last_card:
+            return False
+        if "hearts" in current_card and "hearts" not in last_card:
+            return False
+    else:
+        if (("clubs" in current_card) or ("spades" in current_card)) and (("clubs" in last_card) or ("spades" in last_card)):
+            return False
+        elif (("diamonds" in current_card) or ("hearts" in current_card)) and (("diamonds" in last_card) or ("hearts" in last_card)):
+            return False
+    if "empty_ace_slot" in current_card:
+        return True
+    else:
+        if last_card[1] == "0":
+            last_card = "10"
+        else:
+            last_card = last_card[0]
+
+        if current_card[1] == "0":
+            current_card = "10"
+        else:
+            current_card = current_card[0]
+
+        last_card = card_values.get(last_card, last_card)
+        current_card = card_values.get(current_card, current_card)
+        last_card = int(last_card)
+        current_card = int(current_card)
+
+        if ace_slot:
+            if last_card - 1 == current_card:
+                return True
+            else:
+                return False
+        else:
+            if last_card + 1 == current_card:
+                return True
+            else:
+                return False
+
+
+def legacy():
+    for under in CARD_NAMES:
+        for card in CARD_NAMES:
+            check_move_validity(under, card, False)
+            check_move_validity(under, card, True)
+
+
+def tables():
+    for under in DECK:
+        for card in DECK:
+            TABLEAU_MOVES[card][under]
+            FOUNDATION_MOVES[card][under]
+
+
+def main():
+    checks = 52 * 52 * 2
+    results = {}
+    for name, func in (("check_move_validity", legacy), ("move tables", tables)):
+        best = min(timeit.repeat(func, number=10, repeat=5)) / 10
+        results[name] = best
+        print(f"{name:>20}: {best / checks * 1e9:8.1f} ns per check")
+    print(f"{'speedup':>20}: {results['check_move_validity'] / results['move tables']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
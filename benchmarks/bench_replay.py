@@ -0,0 +1,59 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import KlondikeGame, shuffled_deck
+from replay import replay_moves
+
+GAMES = 200
+MAX_MOVES = 400
+
+
+def record_game(seed, rng):
+    # a random legal game, as the move list a replay would receive
+    game = KlondikeGame(shuffled_deck(seed))
+    moves = []
+    for step in range(MAX_MOVES):
+        legal = game.legal_moves()
+        if not legal:
+            break
+        move = rng.choice(legal)
+        game.play(*move)
+        moves.append(move)
+    return moves, game.layout_key
+
+
+def main():
+    rng = random.Random(0)
+    games = [(seed,) + record_game(seed, rng) for seed in range(GAMES)]
+    total = sum(len(moves) for seed, moves, key in games)
+
+    start = time.perf_counter()
+    for seed, moves, key in games:
+        game = KlondikeGame(shuffled_deck(seed))
+        for move in moves:
+            game.play(*move)
+    played = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for seed, moves, key in games:
+        result = replay_moves(seed, moves)
+        assert result.game.layout_key == key
+    applied = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for seed, moves, key in games:
+        replay_moves(seed, moves, timed=True)
+    timed = time.perf_counter() - start
+
+    print(f"{GAMES} games, {total} moves")
+    for name, seconds in (("play per move", played), ("apply_many", applied), ("apply_many timed", timed)):
+        print(f"{name:>18}: {total / seconds:12,.0f} moves/s")
+    print(f"{'speedup':>18}: {played / applied:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
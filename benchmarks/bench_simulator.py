@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import STOCK, KlondikeGame, shuffled_deck
+from simulator import POLICIES, BatchSimulator
+
+MAX_STEPS = 1000
+
+
+def scalar_choice(game, policy, rng):
+    # the scalar counterpart of the simulator policies
+    moves = game.legal_moves()
+    if policy == "greedy":
+        moves = [move for move in moves if game.move_priority(move) >= 0]
+        if not moves:
+            return None
+        best = max(game.move_priority(move) for move in moves)
+        moves = [move for move in moves if game.move_priority(move) == best]
+    elif policy == "foundation_first":
+        moves = [move for move in game.foundation_moves() if move[0] != STOCK] or moves
+    return rng.choice(moves) if moves else None
+
+
+def play_scalar(seeds, policy, total_redeals):
+    rng = random.Random(0)
+    won = 0
+    steps = 0
+    for seed in seeds:
+        game = KlondikeGame(shuffled_deck(seed), total_redeals=total_redeals)
+        idle = 0
+        for step in range(MAX_STEPS):
+            move = scalar_choice(game, policy, rng)
+            if move is None or idle > game.stock_left + len(game.piles[1]) + 1:
+                break
+            src, dst, count = move
+            if src == STOCK:
+                game.draw()
+            elif dst == STOCK:
+                game.redeal()
+            else:
+                game.move(src, dst, count)
+            idle = idle + 1 if STOCK in (src, dst) else 0
+            steps += 1
+            if game.won:
+                won += 1
+                break
+    return won, steps
+
+
+def main():
+    scalar_games = 200
+    batch_games = 5000
+    for policy in POLICIES:
+        start = time.perf_counter()
+        won, steps = play_scalar(range(scalar_games), policy, 3)
+        scalar = scalar_games / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        simulator = BatchSimulator.from_seeds(range(batch_games), 3)
+        batch_won, batch_steps = simulator.run(POLICIES[policy], MAX_STEPS, seed=0)
+        batch = batch_games / (time.perf_counter() - start)
+
+        print(f"{policy:>16}: scalar {scalar:8.0f} games/s ({won / scalar_games:.1%} won), "
+              f"batch {batch:8.0f} games/s ({batch_won.mean():.1%} won), x{batch / scalar:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import json
+import os
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import DEAL_NUMBERS, KlondikeGame, shuffled_deck
+from solver import WINNABLE, solve
+
+
+def is_winnable(deal_number, total_redeals, max_nodes, time_limit):
+    game = KlondikeGame(shuffled_deck(deal_number), total_redeals=total_redeals)
+    return solve(game, max_nodes, time_limit).outcome == WINNABLE
+
+
+class WinnableDealPool:
+    def __init__(self, path, size=20, max_nodes=20000, time_limit=3.0):
+        self.path = path
+        self.size = size
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.rng = random.Random()
+        # the worker's done callbacks run on the executor's thread
+        self.lock = threading.RLock()
+        self.executor = None
+        self.pending = None
+        self.total_redeals = None
+        try:
+            with open(path, encoding="utf-8") as handle:
+                self.queues = json.load(handle)
+        except (OSError, ValueError):
+            self.queues = {}
+
+    def queue(self, total_redeals):
+        key = "unlimited" if total_redeals is None else str(total_redeals)
+        return self.queues.setdefault(key, [])
+
+    def start(self, total_redeals):
+        with self.lock:
+            self.total_redeals = total_redeals
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(1)
+            self.top_up()
+
+    def stop(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+            self.pending = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def top_up(self):
+        with self.lock:
+            if self.executor is None or self.pending is not None:
+                return
+            if len(self.queue(self.total_redeals)) >= self.size:
+                return
+            deal_number = self.rng.randrange(DEAL_NUMBERS)
+            total_redeals = self.total_redeals
+            self.pending = future = self.executor.submit(
+                is_winnable, deal_number, total_redeals, self.max_nodes, self.time_limit)
+            future.add_done_callback(lambda future: self.solved(future, deal_number, total_redeals))
+
+    def solved(self, future, deal_number, total_redeals):
+        with self.lock:
+            if future is not self.pending:
+                return
+            self.pending = None
+            if future.cancelled() or future.exception() is not None:
+                return
+            if future.result():
+                self.queue(total_redeals).append(deal_number)
+                self.save()
+            self.top_up()
+
+    def pop(self, total_redeals):
+        # None while the worker has nothing ready; the caller polls again
+        # rather than waiting on the Tk thread
+        with self.lock:
+            queue = self.queue(total_redeals)
+            if not queue:
+                return None
+            deal_number = queue.pop(0)
+            self.save()
+            self.top_up()
+            return deal_number
+
+    def save(self):
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as handle:
+            json.dump(self.queues, handle)
+        os.replace(temp, self.path)
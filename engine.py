@@ -0,0 +1,429 @@
+import random
+import time
+from collections import namedtuple
+
+SUITS = ["spades", "hearts", "clubs", "diamonds"]
+RANKS = ["ace", "2", "3", "4", "5", "6", "7",
+         "8", "9", "10", "jack", "queen", "king"]
+RED_SUITS = ("hearts", "diamonds")
+
+# A card is a single int 0-51: suit * 13 + rank - 1, with suits in the
+# order of the foundation slots.
+DECK = range(52)
+RANK = [card % 13 + 1 for card in DECK]
+SUIT = [card // 13 for card in DECK]
+COLOR = [int(SUITS[suit] in RED_SUITS) for suit in SUIT]
+SUIT_COLOR = [int(suit in RED_SUITS) for suit in SUITS]
+CARD_NAMES = [f"{RANKS[RANK[card] - 1]}_of_{SUITS[SUIT[card]]}" for card in DECK]
+CARD_BY_NAME = {name: card for card, name in enumerate(CARD_NAMES)}
+EMPTY = 52
+
+
+def build_move_tables():
+    # [card][card below or EMPTY] -> can card be put there
+    tableau = [[False] * 53 for card in DECK]
+    foundation = [[False] * 53 for card in DECK]
+    for card in DECK:
+        tableau[card][EMPTY] = RANK[card] == 13
+        foundation[card][EMPTY] = RANK[card] == 1
+        for under in DECK:
+            tableau[card][under] = COLOR[card] != COLOR[under] and RANK[card] == RANK[under] - 1
+            foundation[card][under] = SUIT[card] == SUIT[under] and RANK[card] == RANK[under] + 1
+    return tableau, foundation
+
+
+TABLEAU_MOVES, FOUNDATION_MOVES = build_move_tables()
+
+
+def build_zobrist_tables():
+    # fixed seed, so keys are the same in every process and every run
+    rng = random.Random(0x4B4C4F4E)
+
+    def bits():
+        return rng.getrandbits(64)
+
+    # a tableau card is keyed on the card it lies on, which also pins down
+    # which cards share a column without caring about column order
+    tableau = [[[bits() for under in range(53)] for card in DECK] for face_up in range(2)]
+    foundation = [bits() for card in DECK]
+    talon = [bits() for card in DECK]
+    waste = [bits() for count in range(53)]
+    redeals = [bits() for count in range(64)]
+    return tableau, foundation, talon, waste, redeals
+
+
+ZOBRIST_TABLEAU, ZOBRIST_FOUNDATION, ZOBRIST_TALON, ZOBRIST_WASTE, ZOBRIST_REDEALS = build_zobrist_tables()
+
+
+DEAL_NUMBERS = 1000000
+
+
+def shuffled_deck(seed):
+    # the same seed always gives the same deal
+    cards = list(DECK)
+    random.Random(seed).shuffle(cards)
+    return cards
+
+
+STOCK = 0
+WASTE = 1
+FOUNDATIONS = (2, 3, 4, 5)
+TABLEAU = (6, 7, 8, 9, 10, 11, 12)
+PILE_COUNT = 13
+SOURCES = (WASTE,) + FOUNDATIONS + TABLEAU
+TARGETS = FOUNDATIONS + TABLEAU
+
+# everything undo and redo need: the pile move, whether it turned a card
+# face up and the points it earned
+MoveRecord = namedtuple("MoveRecord", ["src", "dst", "count", "flipped", "score"])
+
+
+class KlondikeGame:
+    def __init__(self, cards, total_redeals=None, point_increment=5, starting_points=0):
+        self.total_redeals = total_redeals
+        self.point_increment = point_increment
+        self.starting_points = starting_points
+        self.deal(cards)
+
+    def deal(self, cards):
+        self.cards = list(cards)
+        self.piles = [[] for pile in range(PILE_COUNT)]
+        self.face_down = [0] * PILE_COUNT
+        self.redeals_used = 0
+        # the sum of the score deltas of the moves on the board
+        self.points = 0
+        count = 0
+        for column, pile in enumerate(TABLEAU):
+            self.piles[pile] = self.cards[count:count + column + 1]
+            self.face_down[pile] = column
+            count += column + 1
+        self.piles[STOCK] = self.cards[count:]
+        self.layout_key = 0
+        for pile in range(PILE_COUNT):
+            for index in range(len(self.piles[pile])):
+                self.layout_key ^= self._card_key(pile, index)
+        self.moves_from = [{} for pile in range(PILE_COUNT)]
+        self._moves = None
+        self._reindex(*range(PILE_COUNT))
+
+    def copy(self):
+        game = KlondikeGame.__new__(KlondikeGame)
+        game.__dict__.update(self.__dict__)
+        game.cards = list(self.cards)
+        game.piles = [list(cards) for cards in self.piles]
+        game.face_down = list(self.face_down)
+        game.moves_from = [dict(moves) for moves in self.moves_from]
+        game._moves = None
+        return game
+
+    @property
+    def redeals_left(self):
+        if self.total_redeals is None:
+            return None
+        return max(0, self.total_redeals - 1 - self.redeals_used)
+
+    @property
+    def state_key(self):
+        # the talon keeps its order through draws and redeals, so the layout
+        # plus the waste size and redeals left identify the position
+        key = self.layout_key ^ ZOBRIST_WASTE[len(self.piles[WASTE])]
+        left = self.redeals_left
+        if left is not None:
+            key ^= ZOBRIST_REDEALS[left % 64]
+        return key
+
+    @property
+    def cards_on_foundations(self):
+        return sum(len(self.piles[pile]) for pile in FOUNDATIONS)
+
+    @property
+    def score(self):
+        return self.points + self.starting_points
+
+    @property
+    def stock_left(self):
+        return len(self.piles[STOCK])
+
+    @property
+    def won(self):
+        return self.cards_on_foundations == 52
+
+    @property
+    def trivially_won(self):
+        # nothing hidden and nothing left in the talon: sending cards up in
+        # any order finishes the game
+        return not self.piles[STOCK] and not self.piles[WASTE] and not any(self.face_down)
+
+    def is_face_up(self, pile, index):
+        if pile == STOCK:
+            return False
+        return index >= self.face_down[pile]
+
+    def _card_key(self, pile, index):
+        cards = self.piles[pile]
+        card = cards[index]
+        if pile in TABLEAU:
+            under = cards[index - 1] if index else EMPTY
+            return ZOBRIST_TABLEAU[index >= self.face_down[pile]][card][under]
+        if pile in FOUNDATIONS:
+            return ZOBRIST_FOUNDATION[card]
+        return ZOBRIST_TALON[card]
+
+    def _flip_key(self, pile):
+        # key change of the top card of pile turning face up or down
+        cards = self.piles[pile]
+        under = cards[-2] if len(cards) > 1 else EMPTY
+        return ZOBRIST_TABLEAU[0][cards[-1]][under] ^ ZOBRIST_TABLEAU[1][cards[-1]][under]
+
+    def can_place(self, card, dst, count=1):
+        cards = self.piles[dst]
+        under = cards[-1] if cards else EMPTY
+        if dst in TABLEAU:
+            return TABLEAU_MOVES[card][under]
+        if dst in FOUNDATIONS:
+            return count == 1 and SUIT[card] == dst - FOUNDATIONS[0] and FOUNDATION_MOVES[card][under]
+        return False
+
+    def can_move(self, src, dst, count=1):
+        if src == dst or src == STOCK or count < 1:
+            return False
+        cards = self.piles[src]
+        if len(cards) < count:
+            return False
+        if src in TABLEAU:
+            if len(cards) - count < self.face_down[src]:
+                return False
+        elif count != 1:
+            return False
+        return self.can_place(cards[-count], dst, count)
+
+    def movable_count(self, src, dst):
+        cards = self.piles[src]
+        if not cards or src == dst:
+            return 0
+        if src in TABLEAU and dst in TABLEAU:
+            # face-up cards always form a run, so the only candidate is the
+            # card whose rank fits below the top of dst
+            first = self.face_down[src]
+            target = self.piles[dst]
+            rank = RANK[target[-1]] - 1 if target else 13
+            index = first + RANK[cards[first]] - rank
+            if first <= index < len(cards) and self.can_place(cards[index], dst):
+                return len(cards) - index
+            return 0
+        return 1 if self.can_place(cards[-1], dst) else 0
+
+    def _reindex(self, *piles):
+        self._moves = None
+        for pile in piles:
+            if pile in SOURCES:
+                for dst in TARGETS:
+                    self._index_move(pile, dst)
+            if pile in TARGETS:
+                for src in SOURCES:
+                    self._index_move(src, pile)
+
+    def _index_move(self, src, dst):
+        count = self.movable_count(src, dst)
+        if count:
+            self.moves_from[src][dst] = count
+        else:
+            self.moves_from[src].pop(dst, None)
+
+    def targets(self, src, count):
+        return [dst for dst, movable in self.moves_from[src].items() if movable == count]
+
+    def can_draw(self):
+        return bool(self.piles[STOCK])
+
+    def can_redeal(self):
+        if self.piles[STOCK] or not self.piles[WASTE]:
+            return False
+        return self.redeals_left is None or self.redeals_left > 0
+
+    def move(self, src, dst, count=1):
+        if not self.can_move(src, dst, count):
+            raise ValueError(f"Illegal move: {src} -> {dst} ({count})")
+        return self.apply(src, dst, count)
+
+    def draw(self):
+        if not self.can_draw():
+            raise ValueError("Stock is empty")
+        return self.apply(STOCK, WASTE, 1)
+
+    def redeal(self):
+        if not self.can_redeal():
+            raise ValueError("No redeals left")
+        return self.apply(WASTE, STOCK, len(self.piles[WASTE]))
+
+    def play(self, src, dst, count=1):
+        if src == STOCK:
+            return self.draw()
+        if dst == STOCK:
+            return self.redeal()
+        return self.move(src, dst, count)
+
+    def redo(self, record):
+        return self.apply(record.src, record.dst, record.count)
+
+    def can_play(self, src, dst, count=1):
+        # like play() but strict about the form of draws and redeals, as
+        # recorded in MoveRecord
+        if src == STOCK:
+            return dst == WASTE and count == 1 and self.can_draw()
+        if dst == STOCK:
+            return src == WASTE and count == len(self.piles[WASTE]) and self.can_redeal()
+        return self.can_move(src, dst, count)
+
+    def apply_many(self, moves, timings=None):
+        # validates and applies a whole move sequence in one pass; the move
+        # index is rebuilt once at the end instead of after every move. an
+        # illegal move raises ValueError with the moves before it applied
+        records = []
+        try:
+            if timings is None:
+                for src, dst, count in moves:
+                    if not self.can_play(src, dst, count):
+                        raise ValueError(f"Illegal move #{len(records)}: {src} -> {dst} ({count})")
+                    records.append(self.apply(src, dst, count, reindex=False))
+            else:
+                clock = time.perf_counter
+                for src, dst, count in moves:
+                    start = clock()
+                    if not self.can_play(src, dst, count):
+                        raise ValueError(f"Illegal move #{len(records)}: {src} -> {dst} ({count})")
+                    records.append(self.apply(src, dst, count, reindex=False))
+                    timings.append(clock() - start)
+        finally:
+            self._reindex(*range(PILE_COUNT))
+        return records
+
+    def apply(self, src, dst, count, reindex=True):
+        # applies a move without checking it. with reindex off the move
+        # index goes stale, which suits callers that work out legal moves
+        # themselves, like the solver, or rebuild it at the end
+        flipped = False
+        if src == STOCK:
+            self.piles[WASTE].append(self.piles[STOCK].pop())
+        elif dst == STOCK:
+            self.piles[STOCK] = self.piles[WASTE][::-1]
+            self.piles[WASTE] = []
+            self.redeals_used += 1
+        else:
+            # only the bottom card of the moved run changes what it lies on
+            cards = self.piles[src]
+            self.layout_key ^= self._card_key(src, len(cards) - count)
+            self.piles[dst].extend(cards[-count:])
+            del cards[-count:]
+            self.layout_key ^= self._card_key(dst, len(self.piles[dst]) - count)
+            if src in TABLEAU and cards and len(cards) == self.face_down[src]:
+                self.face_down[src] -= 1
+                self.layout_key ^= self._flip_key(src)
+                flipped = True
+        if reindex:
+            self._reindex(src, dst)
+        score = 0
+        if dst in FOUNDATIONS:
+            score = self.point_increment
+        elif src in FOUNDATIONS:
+            score = -self.point_increment
+        self.points += score
+        return MoveRecord(src, dst, count, flipped, score)
+
+    def undo(self, record, reindex=True):
+        src, dst, count, flipped, score = record
+        self.points -= score
+        if src == STOCK:
+            self.piles[STOCK].append(self.piles[WASTE].pop())
+        elif dst == STOCK:
+            self.piles[WASTE] = self.piles[STOCK][::-1]
+            self.piles[STOCK] = []
+            self.redeals_used -= 1
+        else:
+            if flipped:
+                self.face_down[src] += 1
+                self.layout_key ^= self._flip_key(src)
+            cards = self.piles[dst]
+            self.layout_key ^= self._card_key(dst, len(cards) - count)
+            self.piles[src].extend(cards[-count:])
+            del cards[-count:]
+            self.layout_key ^= self._card_key(src, len(self.piles[src]) - count)
+        if reindex:
+            self._reindex(src, dst)
+
+    def pile_moves(self):
+        if self._moves is None:
+            self._moves = [(src, dst, count) for src in SOURCES
+                           for dst, count in self.moves_from[src].items()]
+        return self._moves
+
+    def legal_moves(self):
+        if self.can_draw():
+            return [(STOCK, WASTE, 1)] + self.pile_moves()
+        if self.can_redeal():
+            return [(WASTE, STOCK, len(self.piles[WASTE]))] + self.pile_moves()
+        return self.pile_moves()
+
+    def foundation_moves(self):
+        return [(src, dst, count) for src, dst, count in self.pile_moves()
+                if dst in FOUNDATIONS and src not in FOUNDATIONS]
+
+    def is_safe(self, card):
+        # no card still in play can need this one to be built on: both
+        # foundations of the other colour are at least one rank below it.
+        # those cards may still come back down from their foundations, but
+        # only to hold a card of this colour two ranks below, so the other
+        # foundation of this colour has to be up to there as well
+        rank = RANK[card]
+        if rank <= 2:
+            return True
+        return all(len(self.piles[pile]) >= rank - 1 - (SUIT_COLOR[pile - FOUNDATIONS[0]] == COLOR[card])
+                   for pile in FOUNDATIONS if pile != FOUNDATIONS[SUIT[card]])
+
+    def foundation_plan(self, safe_only=False):
+        # the whole run of foundation moves, worked out on a copy; with
+        # safe_only only cards nothing could still need are sent up, unless
+        # the board is trivially won anyway
+        game = self.copy()
+        safe_only = safe_only and not game.trivially_won
+        plan = []
+        while True:
+            for move in game.foundation_moves():
+                if not safe_only or game.is_safe(game.piles[move[0]][-1]):
+                    break
+            else:
+                return plan
+            game.move(*move)
+            plan.append(move)
+
+    def move_priority(self, move):
+        src, dst, count = move
+        if src == STOCK or dst == STOCK:
+            return 0
+        cards = self.piles[src]
+        index = len(cards) - count
+        hidden = self.face_down[src] if src in TABLEAU else 0
+        exposes = hidden > 0 and index == hidden
+        if dst in FOUNDATIONS:
+            return 100 + (20 if exposes else 0)
+        if src in FOUNDATIONS:
+            return -20
+        if src == WASTE:
+            return 40
+        if exposes:
+            return (70 if not self.piles[dst] else 80) + hidden
+        if index == 0:
+            # moving a whole column only helps if it lands on another card
+            return 10 if self.piles[dst] else -10
+        if self.can_place(cards[index - 1], FOUNDATIONS[SUIT[cards[index - 1]]]):
+            return 60
+        return -10
+
+    def ranked_moves(self):
+        return sorted(self.legal_moves(), key=self.move_priority, reverse=True)
+
+    def hint(self):
+        moves = self.ranked_moves()
+        if moves and self.move_priority(moves[0]) >= 0:
+            return moves[0]
+        return None
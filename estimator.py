@@ -0,0 +1,64 @@
+import queue
+import time
+
+import numpy as np
+
+from engine import STOCK, TABLEAU
+from simulator import POLICIES, BatchSimulator
+from workers import Worker, latest
+
+
+def hidden_slots(game):
+    # every (pile, index) whose card the player has not seen yet; after a
+    # redeal every talon card has been through the waste once
+    slots = [(pile, index) for pile in TABLEAU for index in range(game.face_down[pile])]
+    if game.redeals_used == 0:
+        slots += [(STOCK, index) for index in range(len(game.piles[STOCK]))]
+    return np.array(slots, dtype=np.int64).reshape(-1, 2).T
+
+
+def rollout(game, count, policy, rng, max_steps=1000):
+    # plays count games from the position, each with the hidden cards dealt
+    # anew, and returns how many were won
+    simulator = BatchSimulator.from_game(game, count)
+    piles, indexes = hidden_slots(game)
+    if len(piles):
+        simulator.piles[:, piles, indexes] = rng.permuted(simulator.piles[:, piles, indexes], axis=1)
+    won, steps = simulator.run(POLICIES[policy], max_steps, rng)
+    return int(won.sum())
+
+
+def estimate_worker(requests, results, batch_size, time_limit, policy):
+    rng = np.random.default_rng()
+    job = latest(requests)
+    while job is not None:
+        position, game = job
+        wins = total = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < time_limit and requests.empty():
+            wins += rollout(game, batch_size, policy, rng)
+            total += batch_size
+            results.put((position, wins, total))
+        job = latest(requests)
+
+
+class WinEstimator(Worker):
+    def __init__(self, batch_size=64, time_limit=5.0, policy="greedy"):
+        Worker.__init__(self, estimate_worker, batch_size, time_limit, policy)
+        self.position = 0
+
+    def estimate(self, game):
+        # a new position makes the worker drop the one before it
+        self.position += 1
+        self.send(self.position, game.copy())
+
+    def poll(self):
+        # newest (wins, rollouts) for the current position, if any arrived
+        estimate = None
+        while True:
+            try:
+                position, wins, total = self.results.get_nowait()
+            except queue.Empty:
+                return estimate
+            if position == self.position:
+                estimate = wins, total
@@ -0,0 +1,37 @@
+import queue
+
+from solver import WINNABLE, solve
+from workers import Worker, latest
+
+
+def hint_worker(requests, results, max_nodes):
+    job = latest(requests)
+    while job is not None:
+        request, game, time_limit = job
+        # a newer request, or stop(), cuts the search short
+        result = solve(game, max_nodes, time_limit, stop=lambda: not requests.empty())
+        move = result.moves[0] if result.outcome == WINNABLE and result.moves else None
+        results.put((request, result.outcome, move))
+        job = latest(requests)
+
+
+class HintWorker(Worker):
+    def __init__(self, max_nodes=200000):
+        Worker.__init__(self, hint_worker, max_nodes)
+        self.request = 0
+
+    def search(self, game, time_limit):
+        self.request += 1
+        self.send(self.request, game.copy(), time_limit)
+        return self.request
+
+    def poll(self, request):
+        # (outcome, first move of a winning line or None) once the search
+        # for request is done
+        while True:
+            try:
+                done, outcome, move = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if done == request:
+                return outcome, move
@@ -0,0 +1,132 @@
+import json
+import os
+import queue
+import threading
+import time
+
+# one JSON value per line: a header {"deal": ..., "redeals": ...} and then
+# one event per move, ["m", src, dst, count, seconds] for a new move and
+# ["u", seconds] / ["r", seconds] for undo and redo
+
+
+def load_journal(path):
+    # (header, events) of an unfinished game, or None; a line torn by a
+    # crash ends the journal
+    try:
+        with open(path, encoding="utf-8") as handle:
+            lines = handle.read().split("\n")
+    except OSError:
+        return None
+    values = []
+    for line in lines:
+        try:
+            values.append(json.loads(line))
+        except ValueError:
+            break
+    if not values or not isinstance(values[0], dict):
+        return None
+    return values[0], values[1:]
+
+
+def replay(game, events):
+    # re-applies the journal to a freshly dealt game; returns the history
+    # and redo stacks and the stopwatch value at the last event
+    history = []
+    redo = []
+    elapsed = 0
+    for event in events:
+        kind = event[0]
+        if kind == "m":
+            history.append(game.play(*event[1:4]))
+            redo = []
+        elif kind == "u":
+            record = history.pop()
+            game.undo(record)
+            redo.append(record)
+        elif kind == "r":
+            history.append(game.redo(redo.pop()))
+        elapsed = event[-1]
+    return history, redo, elapsed
+
+
+class Journal:
+    def __init__(self, path, sync_interval=1.0):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def start(self, header, events=()):
+        self.queue.put(("start", [header] + list(events)))
+
+    def append(self, event):
+        self.queue.put(("append", event))
+
+    def set_header(self, header):
+        # rewrites the journal with a new header and the events so far
+        self.queue.put(("header", header))
+
+    def clear(self):
+        self.queue.put(("clear", None))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def rewrite(self, values):
+        # a crash halfway through leaves the previous journal intact
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as handle:
+            handle.writelines(json.dumps(value) + "\n" for value in values)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, self.path)
+        return open(self.path, "a", encoding="utf-8")
+
+    def write_loop(self):
+        # the only place that touches the file, so the UI never waits on it
+        handle = None
+        values = []
+        dirty = False
+        synced = time.monotonic()
+        while True:
+            try:
+                job = self.queue.get(timeout=self.sync_interval)
+            except queue.Empty:
+                job = ()
+            if job is None:
+                break
+            if job:
+                kind, data = job
+                if kind == "start" or kind == "header" and handle is not None:
+                    if handle is not None:
+                        handle.close()
+                    if kind == "start":
+                        values = data
+                    else:
+                        values[0] = data
+                    handle = self.rewrite(values)
+                    synced = time.monotonic()
+                    dirty = False
+                elif kind == "append" and handle is not None:
+                    handle.write(json.dumps(data) + "\n")
+                    values.append(data)
+                    dirty = True
+                elif kind == "clear":
+                    if handle is not None:
+                        handle.close()
+                        handle = None
+                    values = []
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                    dirty = False
+            if dirty and time.monotonic() - synced >= self.sync_interval:
+                handle.flush()
+                os.fsync(handle.fileno())
+                synced = time.monotonic()
+                dirty = False
+        if handle is not None:
+            handle.flush()
+            os.fsync(handle.fileno())
+            handle.close()
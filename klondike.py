@@ -1,10 +1,27 @@
 import json
+import logging
 import os
 import random
+import sys
+import time
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import messagebox, simpledialog, ttk
 from tkinter.colorchooser import askcolor
-from PIL import Image, ImageTk
+
+from animation import Animator
+from asset_manager import BACKS, FACES, ICONS, SLOTS, AssetManager, OverlayCache, face_name
+from deal_pool import WinnableDealPool
+from hints import HintWorker
+from registry import CardRegistry
+from layout import Layout
+from journal import Journal, load_journal, replay
+from engine import (CARD_NAMES, DEAL_NUMBERS, FOUNDATIONS, PILE_COUNT, STOCK, SUITS, TABLEAU, WASTE,
+                    KlondikeGame, shuffled_deck)
+
+try:
+    from estimator import WinEstimator
+except ImportError:
+    WinEstimator = None
 
 DEFAULT_SETTINGS = {"movetype": "Перетаскивание",
                     "gamemode": "Тренировочный",
@@ -12,6 +29,8 @@ DEFAULT_SETTINGS = {"movetype": "Перетаскивание",
                     "show_header": "True",
                     "card_back": "dark_back",
                     "canvas_color": "#0d4b34",
+                    "winnable_only": "False",
+                    "reduce_motion": "False",
                     }
 
 
@@ -146,53 +165,78 @@ class Stopwatch(tk.Label):
 
 
 class SolitareGameWindow(tk.Tk):
-    def __init__(self, **kwargs):
+    def __init__(self, deal_number=None, **kwargs):
         tk.Tk.__init__(self, **kwargs)
         self.title("Пасьянс")
         self.minsize(1300, 800)
-        solitaire_frame = SolitareGameFrame(self)
+        solitaire_frame = SolitareGameFrame(self, deal_number=deal_number)
         solitaire_frame.pack(expand=True, fill="both")
         self.iconbitmap(os.path.join("assets", "icon.ico"))
 
 
 class SolitareGameFrame(tk.Frame):
-    def __init__(self, parent, **kwargs):
+    def __init__(self, parent, deal_number=None, **kwargs):
         tk.Frame.__init__(self, parent, **kwargs)
         self.bind_all("<Control-n>", self.new_game)
+        self.bind_all("<Control-g>", self.choose_deal)
         self.bind_all("<Control-r>", self.restart_game)
         self.bind_all("<Control-z>", self.undo_move)
         self.bind_all("<Control-y>", self.redo_move)
         self.bind_all("<Control-h>", self.generate_hint)
         self.bind_all("<F5>", self.send_cards_up)
+        self.bind_all("<Shift-F5>", self.send_safe_cards_up)
+        self.bind_all("<Escape>", self.stop_sending)
         self.bind_all("<F1>", self.open_settings)
         self.bind_all("<F11>", self.fullscreen)
         self.canvas = tk.Canvas(self, bd=0, highlightthickness=0)
-        self.card_drawing_count = 0
-        self.cards_on_ace = 0
         self.parent = parent
         self.win_fullscreen = not parent.attributes("-fullscreen")
-        self.card_moved_to_ace_by_sender = 0
-        self.stock_left = 24
-        self.redeals_left = 0
-        self.last_active_card = ""
-        self.card_stack_list = ""
+        self.selected = None
+        self.hint_move = None
+        self.hint_shown = False
         self.cards = []
-        self.rect_images = []
-        self.button_images = []
-        self.dict_of_cards = {}
+        self.assets = AssetManager(self)
+        self.overlays = OverlayCache(self)
+        self.registry = CardRegistry()
+        self.layout = Layout()
+        self.slot_items = {}
+        self.resize_job = None
         self.card_back = None
         self.history = []
         self.redo = []
         self.game_started = False
         self.move_flag = False
-        self.win = None
+        self.drop_targets = []
+        self.drop_target = None
+        self.rng = random.Random()
+        self.deal_number = None
+        # set while the deal on the table is a random stand-in for a checked
+        # one; poll_deal_pool() swaps it out if no move has been made yet
+        self.unchecked_deal = False
+        self.deal_pool_job = None
+        self.deal_pool = WinnableDealPool(os.path.join("assets", "winnable_deals.json"))
+        self.win_estimator = WinEstimator() if WinEstimator is not None else None
+        self.hint_worker = HintWorker()
+        self.hint_request = None
+        self.send_plan = None
+        self.send_job = None
+        self.journal = Journal(os.path.join("assets", "journal.jsonl"))
         self.load_settings()
+        self.animator = Animator(self.canvas, reduce_motion=self.reduce_motion)
         self.load_images()
-        self.shuffle_cards()
+        self.game = KlondikeGame([])
+        self.apply_game_rules()
+        saved = load_journal(self.journal.path) if deal_number is None else None
+        if saved is not None and saved[0].get("redeals", "") == self.game.total_redeals:
+            deal_number = saved[0].get("deal")
+        else:
+            saved = None
+        self.shuffle_cards(deal_number)
+        self.game.deal(self.cards)
         self.draw_card_slots()
-        self.generate_card_position()
-        self.draw_remaining_cards()
+        self.draw_cards()
         self.create_widgets()
+        self.restore_game(saved)
 
     def load_settings(self):
         settings = json.load(open("assets/settings.json", encoding="utf-8"))
@@ -200,8 +244,11 @@ class SolitareGameFrame(tk.Frame):
         self.gamemode = settings["gamemode"]
         self.canvas_hover_time = 300
         self.wait_before_send = 150
+        self.hint_time = 1.5
         self.show_footer = settings["show_footer"] == "True"
         self.show_header = settings["show_header"] == "True"
+        self.winnable_only = settings.get("winnable_only", DEFAULT_SETTINGS["winnable_only"]) == "True"
+        self.reduce_motion = settings.get("reduce_motion", DEFAULT_SETTINGS["reduce_motion"]) == "True"
         self.canvas.config(bg=settings["canvas_color"])
         self.restart_game_button_enabled = True
         self.undo_last_move_button_enabled = True
@@ -210,7 +257,6 @@ class SolitareGameFrame(tk.Frame):
         self.show_stopwatch = True
         self.starting_points = 0
         self.point_increment = 5
-        self.back_of_card_file = os.path.join("assets", settings["card_back"] + ".png")
         self.card_back = settings["card_back"]
 
         if self.gamemode == "Стандартный":
@@ -221,6 +267,32 @@ class SolitareGameFrame(tk.Frame):
             self.point_increment = 1
             self.refresh_points_after_game = True
 
+    def apply_game_rules(self):
+        self.game.total_redeals = None if self.total_redeals == "unlimited" else self.total_redeals
+        self.game.point_increment = self.point_increment
+        self.game.starting_points = self.starting_points
+        if self.winnable_only:
+            self.deal_pool.start(self.game.total_redeals)
+        else:
+            self.deal_pool.stop()
+
+    def destroy(self):
+        self.stop_sending()
+        self.animator.cancel()
+        if self.resize_job is not None:
+            self.after_cancel(self.resize_job)
+        if self.deal_pool_job is not None:
+            self.after_cancel(self.deal_pool_job)
+        self.deal_pool.stop()
+        self.hint_worker.stop()
+        self.journal.close()
+        self.assets.stop()
+        # how well the overlay cache did this session; shown with logging
+        # at DEBUG level
+        logging.debug("%r", self.overlays)
+        if self.win_estimator is not None:
+            self.win_estimator.stop()
+        tk.Frame.destroy(self)
 
     def create_widgets(self):
         self.rowconfigure(1, weight=1)
@@ -231,28 +303,28 @@ class SolitareGameFrame(tk.Frame):
                            "activebackground": "#4f4a4a", "highlightbackground": "#1c1a1a",
                            "clickedbackground": "#2e2b2b"}
         self.new_game_button = new_game_button = HoverButton(
-            header, alt="Начать новую игру (Ctrl+N)", command=self.new_game,
-            image=self.convert_pictures("new_game.png", main=False), **button_settings)
+            header, alt="Начать новую игру (Ctrl+N)\nВыбрать номер игры (Ctrl+G)", command=self.new_game,
+            image=self.assets.get("new_game"), **button_settings)
         self.restart_game_button = restart_game_button = HoverButton(
             header, alt="Перезапустить игру (Ctrl+R)", command=self.restart_game, state="disabled",
-            image=self.convert_pictures("restart_game.png", main=False), **button_settings)
+            image=self.assets.get("restart_game"), **button_settings)
         self.undo_last_move_button = undo_last_move_button = HoverButton(
             header, alt="Отменить ход (Ctrl+Z)", command=self.undo_move, state="disabled",
-            image=self.convert_pictures("undo.png", main=False), **button_settings)
+            image=self.assets.get("undo"), **button_settings)
         self.redo_last_move_button = redo_last_move_button = HoverButton(
             header, alt="Повторить ход (Ctrl+Shift+Z)", command=self.redo_move, state="disabled",
-            image=self.convert_pictures("redo.png", main=False), **button_settings)
+            image=self.assets.get("redo"), **button_settings)
         self.hint_button = hint_button = HoverButton(
             header, alt="Показать подсказку (Ctrl+H)", command=self.generate_hint,
-            image=self.convert_pictures("hint.png", main=False), **button_settings)
+            image=self.assets.get("hint"), **button_settings)
         self.send_cards_up_button = send_cards_up_button = HoverButton(
             header, alt="Отправить в базу (F5)", command=self.send_cards_up,
-            image=self.convert_pictures("send.png", main=False), **button_settings)
+            image=self.assets.get("send"), **button_settings)
         self.settings_button = settings_button = HoverButton(
             header, alt="Настройки игры (F1)", command=self.open_settings,
-            image=self.convert_pictures("settings.png", main=False), **button_settings)
+            image=self.assets.get("settings"), **button_settings)
         self.fullscreen_button = fullscreen_button = HoverButton(header, alt="Полноэкранный режим (F11)",
-            command=self.fullscreen, image=self.convert_pictures("maximize.png", main=False),
+            command=self.fullscreen, image=self.assets.get("maximize"),
             ttlocationinvert=True, **button_settings)
 
         header.columnconfigure(12, weight=1)
@@ -275,7 +347,7 @@ class SolitareGameFrame(tk.Frame):
         ttforeground="white", ttfont=("Verdana", "10", "normal"),
         bg=self.canvas["bg"], activebackground=self.generate_new_color(self.canvas["bg"]),
         highlightbackground="#0d4b34", clickedbackground=self.generate_new_color(self.canvas["bg"]),
-        command=self.open_settings, relief="flat", image=self.convert_pictures("settings.png", main=False))
+        command=self.open_settings, relief="flat", image=self.assets.get("settings"))
 
         if self.show_header:
             header.grid(row=0, column=0, columnspan=100, sticky="ew")
@@ -283,18 +355,21 @@ class SolitareGameFrame(tk.Frame):
             self.canvas.rowconfigure(1, weight=1)
             headerless_settings_button.grid(row=1, sticky="sw")
         self.canvas.grid(row=1, column=0, sticky="nsew")
+        self.canvas.bind("<Configure>", self.resize_canvas)
         self.footer = footer = MenuBar(self)
         self.points_label = tk.Label(
             footer, text=f"Очки: {self.starting_points}", fg="white", bg="#1c1a1a")
         self.stopwatch = stopwatch = Stopwatch(
             footer, fg="white", bg="#1c1a1a")
         if self.total_redeals != "unlimited":
-            self.redeal_label = tk.Label(footer, text=f"Осталось пересдач: {max(0, self.total_redeals + self.redeals_left - 1)}", fg="white", bg="#1c1a1a")
+            self.redeal_label = tk.Label(footer, text=f"Осталось пересдач: {self.game.redeals_left}", fg="white", bg="#1c1a1a")
         else:
             self.redeal_label = tk.Label(
                 footer, text="", fg="white", bg="#1c1a1a")
         self.stock_label = tk.Label(
-            footer, text=f"Осталось карт:  {self.stock_left}", fg="white", bg="#1c1a1a")
+            footer, text=f"Осталось карт:  {self.game.stock_left}", fg="white", bg="#1c1a1a")
+        self.win_chance_label = tk.Label(
+            footer, text="", fg="white", bg="#1c1a1a")
 
         if self.show_footer:
             footer.grid(row=2, column=0, sticky="ew")
@@ -302,6 +377,10 @@ class SolitareGameFrame(tk.Frame):
         self.points_label.pack(side="right", padx=6, pady=4)
         if self.show_stopwatch:
             stopwatch.pack(side="right", padx=6, pady=4)
+        if self.win_estimator is not None:
+            self.win_chance_label.pack(side="right", padx=6, pady=4)
+        self.update_win_chance()
+        self.poll_win_chance()
 
     def open_settings(self, *args):
         if self.move_flag:
@@ -315,26 +394,29 @@ class SolitareGameFrame(tk.Frame):
 
         if self.win_fullscreen:
             self.fullscreen_button.config(
-                image=self.convert_pictures("minimize.png", main=False))
+                image=self.assets.get("minimize"))
             self.win_fullscreen = False
         else:
             self.fullscreen_button.config(
-                image=self.convert_pictures("maximize.png", main=False))
+                image=self.assets.get("maximize"))
             self.win_fullscreen = True
 
     def continue_settings(self, *args):
         previous_movetype = self.movetype
-        self.canvas.tag_unbind("card_below_rect", "<Enter>")
         self.canvas.tag_unbind("rect", "<Enter>")
         self.canvas.tag_unbind("rect", "<Leave>")
         self.canvas.tag_unbind("rect", "<Button-1>")
-        self.canvas.delete("rect")
-        self.last_active_card = ""
-        self.card_stack_list = ""
+        self.clear_selection()
+        header = self.journal_header()
         self.load_settings()
+        self.apply_game_rules()
+        if self.journal_header() != header:
+            # the game goes on under the new rules, and is resumed under them
+            self.journal.set_header(self.journal_header())
+        self.animator.reduce_motion = self.reduce_motion
+        self.update_win_chance()
         self.update_idletasks()
-        back_of_card = Image.open(self.back_of_card_file)
-        self.back_of_card = (ImageTk.PhotoImage(back_of_card))
+        self.back_of_card = self.assets.get(self.card_back, self.layout.card_size)
         self.canvas.itemconfig("face_down", image=self.back_of_card)
         self.restart_game_button.movetype = self.movetype
         self.undo_last_move_button.movetype = self.movetype
@@ -374,6 +456,7 @@ class SolitareGameFrame(tk.Frame):
 
         self.points_label.pack_forget()
         self.stopwatch.pack_forget()
+        self.win_chance_label.pack_forget()
         self.redeal_label.pack_forget()
         self.stock_label.pack_forget()
 
@@ -383,12 +466,14 @@ class SolitareGameFrame(tk.Frame):
                 self.footer.grid(row=2, column=0, sticky="ew")
         else:
             self.footer.grid_forget()
-        self.points_label["text"] = (f"Очки:  {(self.cards_on_ace * self.point_increment) + self.starting_points}")
+        self.points_label["text"] = (f"Очки:  {self.game.score}")
         self.points_label.pack(side="right", padx=6, pady=4)
         if self.show_stopwatch:
             self.stopwatch.pack(side="right", padx=6, pady=4)
+        if self.win_estimator is not None:
+            self.win_chance_label.pack(side="right", padx=6, pady=4)
         if self.total_redeals != "unlimited":
-            self.redeal_label.config(text=f"Осталось пересдач:  {max(0, self.total_redeals + self.redeals_left - 1)}")
+            self.redeal_label.config(text=f"Осталось пересдач:  {self.game.redeals_left}")
             if self.game_started:
                 self.redeal_label.pack(side="left", padx=6, pady=4)
         if self.game_started:
@@ -410,82 +495,8 @@ class SolitareGameFrame(tk.Frame):
             self.headerless_settings_button.grid(row=1, sticky="sw")
 
         if self.movetype != previous_movetype:
-            for card in self.canvas.find_withtag("face_up"):
-                card_tag = self.canvas.gettags(card)[0]
-                self.canvas.tag_unbind(card_tag,  "<Button-1>")
-                self.canvas.tag_unbind(card_tag, "<Button1-Motion>")
-                self.canvas.tag_unbind(card_tag, "<ButtonRelease-1>")
-                self.canvas.tag_unbind(card_tag, "<Enter>")
-                self.canvas.tag_unbind(card_tag, "<Leave>")
-
-                if self.movetype == "Клик":
-                    self.canvas.tag_bind(
-                        card_tag, "<Button-1>", self.card_onclick)
-                else:
-                    self.canvas.tag_bind(
-                        card_tag, "<Button-1>", self.end_onclick)
-                    self.canvas.tag_bind(
-                        card_tag, "<Button1-Motion>", self.move_card)
-                    self.canvas.tag_bind(
-                        card_tag, "<ButtonRelease-1>", self.drop_card)
-                    self.canvas.tag_bind(
-                        card_tag, "<Enter>", self.on_draggable_card)
-                    self.canvas.tag_bind(
-                        card_tag, "<Leave>", self.leave_draggable_card)
-
-            for card in self.canvas.find_overlapping(*self.canvas.bbox("empty_cardstack_slot")):
-                card_tag = self.canvas.gettags(card)[0]
-                if card_tag == "empty_cardstack_slot":
-                    continue
-                else:
-                    self.canvas.tag_unbind(card_tag, "<Enter>")
-                    self.canvas.tag_unbind(card_tag, "<Leave>")
-
-            self.canvas.tag_unbind("empty_slot", "<Enter>")
-            self.canvas.tag_unbind("empty_ace_slot", "<Enter>")
-            self.canvas.tag_unbind("empty_cardstack_slot", "<Enter>")
-            self.canvas.tag_unbind("empty_slot", "<Leave>")
-            self.canvas.tag_unbind("empty_ace_slot", "<Leave>")
-            self.canvas.tag_unbind("empty_cardstack_slot", "<Leave>")
-            self.canvas.tag_unbind("empty_slot", "<Button-1>")
-            self.canvas.tag_unbind("empty_ace_slot", "<Button-1>")
-            self.canvas.tag_unbind("empty_cardstack_slot", "<Button-1>")
-            self.canvas.tag_unbind("empty_slot", "<Button-1>")
-            self.canvas.tag_unbind("empty_ace_slot", "<Button-1>")
-            self.canvas.tag_unbind("empty_cardstack_slot", "<Button-1>")
-            self.canvas.tag_unbind("empty_slot", "<Button-1>")
-            self.canvas.tag_unbind("empty_ace_slot", "<Button-1>")
-            self.canvas.tag_unbind("empty_slot", "<Button1-Motion>")
-            self.canvas.tag_unbind("empty_slot", "<ButtonRelease-1>")
-            self.canvas.tag_unbind("empty_ace_slot", "<Button1-Motion>")
-            self.canvas.tag_unbind("empty_ace_slot", "<ButtonRelease-1>")
-            self.canvas.tag_unbind("empty_cardstack_slot", "<Button-1>")
+            self.bind_card_events()
 
-            if self.movetype == "Клик":
-                self.canvas.tag_bind(
-                    "empty_slot", "<Button-1>", self.card_onclick)
-                self.canvas.tag_bind(
-                    "empty_ace_slot", "<Button-1>", self.card_onclick)
-                self.canvas.tag_bind("empty_cardstack_slot",
-                                     "<Button-1>", self.refill_card_stack)
-            else:
-                self.canvas.tag_bind(
-                    "empty_slot", "<Button-1>", self.end_onclick)
-                self.canvas.tag_bind(
-                    "empty_ace_slot", "<Button-1>", self.end_onclick)
-                self.canvas.tag_bind(
-                    "empty_slot", "<Button1-Motion>", self.move_card)
-                self.canvas.tag_bind(
-                    "empty_slot", "<ButtonRelease-1>", self.drop_card)
-                self.canvas.tag_bind(
-                    "empty_ace_slot", "<Button1-Motion>", self.move_card)
-                self.canvas.tag_bind(
-                    "empty_ace_slot", "<ButtonRelease-1>", self.drop_card)
-                self.canvas.tag_bind("empty_cardstack_slot",
-                                     "<Button-1>", self.refill_card_stack)
-        ret = False
-        
-                
     def generate_new_color(self, color):
         rgb = list(self.hex_to_rgb(color))
         thresholds = [200, 130, 130]          
@@ -508,162 +519,234 @@ class SolitareGameFrame(tk.Frame):
         return f"#{red:02x}{green:02x}{blue:02x}"
 
     def load_images(self):
-        suits = ["clubs", "diamonds", "spades", "hearts"]
-        ranks = ["ace", "2", "3", "4", "5", "6", "7",
-                 "8", "9", "10", "jack", "queen", "king"]
-
-        for suit in suits:
-            for rank in ranks:
-                name_of_image = os.path.join("assets", "cards", f"{rank}_of_{suit}.png")
-                image = Image.open(name_of_image)
-                self.cards.append(f"{rank}_of_{suit}")
-                self.dict_of_cards[(f"{rank}_of_{suit}")] = (ImageTk.PhotoImage(image))
-        back_of_card = Image.open(self.back_of_card_file)
-        self.back_of_card = (ImageTk.PhotoImage(back_of_card))
-
-    def shuffle_cards(self):
-        random.shuffle(self.cards)
-
-    def generate_card_position(self):
-        rows = 7
-        column = 0
-
-        for i in range(rows):
-            for e in range(column):
-                self.draw_down_cards((i + 1), (e + 1))
-            column += 1
-            self.draw_up_cards((i + 1), (column))
-
-    def draw_up_cards(self, row, col):
-        card_tag = str(self.cards[self.card_drawing_count])
-        card_image = self.dict_of_cards[self.cards[self.card_drawing_count]]
-        self.canvas.create_image(165 + row * 130, col * 20 + 250, image=card_image,
-                                 tag=(card_tag, "face_up"), anchor=tk.NW)
-        if self.movetype == "Клик":
-            self.canvas.tag_bind(card_tag, "<Button-1>", self.card_onclick)
+        # backs, slots and icons are decoded first so the table can be drawn
+        # at once; the faces keep decoding while the deal is on screen
+        self.assets.prefetch(BACKS + SLOTS + ICONS)
+        self.assets.prefetch(FACES)
+        self.back_of_card = self.assets.get(self.card_back, self.layout.card_size)
+
+    def shuffle_cards(self, deal_number=None):
+        if self.deal_pool_job is not None:
+            self.after_cancel(self.deal_pool_job)
+            self.deal_pool_job = None
+        self.unchecked_deal = False
+        if deal_number is None and self.winnable_only:
+            deal_number = self.deal_pool.pop(self.game.total_redeals)
+            if deal_number is None:
+                self.unchecked_deal = True
+                self.deal_pool_job = self.after(500, self.poll_deal_pool)
+        if deal_number is None:
+            deal_number = self.rng.randrange(DEAL_NUMBERS)
+        self.deal_number = deal_number
+        self.cards = shuffled_deck(deal_number)
+        if self.unchecked_deal:
+            self.parent.title(f"Пасьянс — игра №{deal_number} (не проверена)")
         else:
-            self.canvas.tag_bind(card_tag, "<Button-1>", self.end_onclick)
-            self.canvas.tag_bind(card_tag, "<Button1-Motion>", self.move_card)
-            self.canvas.tag_bind(card_tag, "<ButtonRelease-1>", self.drop_card)
-            self.canvas.tag_bind(card_tag, "<Enter>", self.on_draggable_card)
-            self.canvas.tag_bind(card_tag, "<Leave>", self.leave_draggable_card)
-        self.card_drawing_count += 1
-
-    def draw_down_cards(self, row, col):
-        card_tag = str(self.cards[self.card_drawing_count])
-        self.canvas.tag_unbind(card_tag,  "<Button-1>")
-        self.canvas.tag_unbind(card_tag, "<Button1-Motion>")
-        self.canvas.tag_unbind(card_tag, "<ButtonRelease-1>")
-        self.canvas.tag_unbind(card_tag, "<Enter>")
-        self.canvas.tag_unbind(card_tag, "<Leave>")
-        self.canvas.create_image(165 + row * 130, col * 20 + 250, image=self.back_of_card,
-                                 tag=(card_tag, "face_down"), anchor=tk.NW)
-        self.card_drawing_count += 1
-
-    def draw_remaining_cards(self):
-        remaining_cards = 52 - self.card_drawing_count
-        for i in range(remaining_cards):
-            card_tag = str(self.cards[self.card_drawing_count])
-            self.canvas.tag_unbind(card_tag, "<Enter>")
-            self.canvas.tag_unbind(card_tag, "<Leave>")
-            self.canvas.create_image(51, 50, image=self.back_of_card,
-                                     tag=(card_tag, "face_down"), anchor=tk.NW)
-            self.canvas.tag_bind(card_tag, "<Button-1>", self.stack_onclick)
-            self.card_drawing_count += 1
+            self.parent.title(f"Пасьянс — игра №{deal_number}")
 
-    def rounded_rectangle(self, x1, y1, x2, y2, r=18, **kwargs):
-        points = (x1 + r, y1, x1 + r, y1, x2 - r, y1, x2 - r, y1, x2, y1, x2, y1 + r,
-                  x2, y1 + r, x2, y2 - r, x2, y2 - r, x2, y2, x2 - r, y2, x2 - r, y2,
-                  x1 + r, y2, x1 + r, y2, x1, y2, x1, y2 - r, x1, y2 - r, x1, y1 + r, x1, y1 + r, x1, y1)
-        return self.canvas.create_polygon(points, **kwargs, smooth=True)
-
-    def convert_pictures(self, url, main=True):
-        picture = Image.open(os.path.join("assets", url))
-        picture = (ImageTk.PhotoImage(picture))
-        if main:
-            self.canvas.images.append(picture)
+    def poll_deal_pool(self):
+        self.deal_pool_job = None
+        if not self.unchecked_deal or not self.winnable_only or self.game_started:
+            return
+        if self.move_flag:
+            self.deal_pool_job = self.after(500, self.poll_deal_pool)
+            return
+        deal_number = self.deal_pool.pop(self.game.total_redeals)
+        if deal_number is None:
+            self.deal_pool_job = self.after(500, self.poll_deal_pool)
         else:
-            self.button_images.append(picture)
-        return picture                
-        
+            self.new_game(deal_number=deal_number)
+
+    def draw_cards(self):
+        self.registry.clear()
+        for card in self.cards:
+            item = self.canvas.create_image(0, 0, image=self.back_of_card, tag=(CARD_NAMES[card], "face_down"),
+                                            anchor=tk.NW)
+            self.registry.add(card, item)
+        self.render(animate=False)
+
+    def render(self, *piles, animate=True):
+        # only cards that moved or turned over since they were last drawn are
+        # touched; they slide to their places unless animate is off, as after
+        # a deal
+        registry = self.registry
+        for pile in piles or range(PILE_COUNT):
+            for index, card in enumerate(self.game.piles[pile]):
+                if pile == STOCK:
+                    face = "stock"
+                elif self.game.is_face_up(pile, index):
+                    face = "face_up"
+                else:
+                    face = "face_down"
+                position = self.card_position(pile, index)
+                moved, turned = registry.update(card, position, face)
+                item = registry.items[card]
+                if turned:
+                    if face == "face_up":
+                        image, tags = self.assets.get(face_name(card), self.layout.card_size), (CARD_NAMES[card], "face_up")
+                    elif face == "stock":
+                        image, tags = self.back_of_card, (CARD_NAMES[card], "face_down", "stock")
+                    else:
+                        image, tags = self.back_of_card, (CARD_NAMES[card], "face_down")
+                    self.canvas.itemconfig(item, image=image, tags=tags)
+                if moved:
+                    self.animator.move(item, *position, duration=None if animate else 0)
+                    self.canvas.tag_raise(item)
+
+    def rounded_points(self, x1, y1, x2, y2, r=18):
+        return (x1 + r, y1, x1 + r, y1, x2 - r, y1, x2 - r, y1, x2, y1, x2, y1 + r,
+                x2, y1 + r, x2, y2 - r, x2, y2 - r, x2, y2, x2 - r, y2, x2 - r, y2,
+                x1 + r, y2, x1 + r, y2, x1, y2, x1, y2 - r, x1, y2 - r, x1, y1 + r, x1, y1 + r, x1, y1)
+
+    def rounded_rectangle(self, x1, y1, x2, y2, r=18, **kwargs):
+        return self.canvas.create_polygon(self.rounded_points(x1, y1, x2, y2, r), **kwargs, smooth=True)
+
     def draw_card_slots(self):
         self.aces_moved = False
-        self.canvas.images = list()
-        positions_of_main_rects = [
-                (295, 250), (425, 250), (555, 250), (685, 250), (815, 250), (945, 250), (1075, 250)]
-
-        self.empty_slot = empty_slot = self.convert_pictures("empty_slot.png")
-        for item in positions_of_main_rects:
-            self.canvas.create_image(*item, image=empty_slot, tag=("empty_slot"), anchor=tk.NW)
-
-        self.canvas.create_image(525, 50, image=self.convert_pictures("ace_of_spades_slot.png"),
-                                 tag=("spades", "empty_ace_slot"), anchor=tk.NW)
-        self.canvas.create_image(665, 50, image=self.convert_pictures("ace_of_hearts_slot.png"),
-                                 tag=("hearts", "empty_ace_slot"), anchor=tk.NW)
-        self.canvas.create_image(805, 50, image=self.convert_pictures("ace_of_clubs_slot.png"),
-                                 tag=("clubs", "empty_ace_slot"), anchor=tk.NW)
-        self.canvas.create_image(945, 50, image=self.convert_pictures("ace_of_diamonds_slot.png"),
-                                 tag=("diamonds", "empty_ace_slot"), anchor=tk.NW)
-
-        self.rounded_rectangle(52, 52, 149, 178, width=3, fill="#0f412e", outline="#0d7c53",
-                               tag="empty_cardstack_slot")
-        self.rounded_rectangle(166, 52, 259, 178, width=3, fill="#0f412e", outline="#0d7c53",
-                               tag="empty_cardstack_slotb")
+        for pile in TABLEAU:
+            self.slot_items[pile] = self.canvas.create_image(0, 0, tag=("empty_slot"), anchor=tk.NW)
+        for pile, suit in zip(FOUNDATIONS, SUITS):
+            self.slot_items[pile] = self.canvas.create_image(0, 0, tag=(suit, "empty_ace_slot"), anchor=tk.NW)
+        self.slot_items[STOCK] = self.rounded_rectangle(0, 0, 0, 0, fill="#0f412e", outline="#0d7c53",
+                                                        tag="empty_cardstack_slot")
+        self.slot_items[WASTE] = self.rounded_rectangle(0, 0, 0, 0, fill="#0f412e", outline="#0d7c53",
+                                                        tag="empty_cardstack_slotb")
+        self.place_slots()
+        self.bind_card_events()
+        self.canvas.bind("<Button-1>", self.on_background)
+
+    def bind_card_events(self):
+        for sequence in ("<Button-1>", "<Button1-Motion>", "<ButtonRelease-1>", "<Enter>", "<Leave>"):
+            self.canvas.tag_unbind("face_up", sequence)
+            self.canvas.tag_unbind("empty_slot", sequence)
+            self.canvas.tag_unbind("empty_ace_slot", sequence)
 
         if self.movetype == "Клик":
+            self.canvas.tag_bind("face_up", "<Button-1>", self.card_onclick)
             self.canvas.tag_bind("empty_slot", "<Button-1>", self.card_onclick)
             self.canvas.tag_bind("empty_ace_slot", "<Button-1>", self.card_onclick)
-            self.canvas.tag_bind("empty_cardstack_slot","<Button-1>", self.refill_card_stack)
         else:
-            self.canvas.tag_bind("empty_slot", "<Button-1>", self.end_onclick)
-            self.canvas.tag_bind("empty_ace_slot", "<Button-1>", self.end_onclick)
-            self.canvas.tag_bind("empty_slot", "<Button1-Motion>", self.move_card)
-            self.canvas.tag_bind("empty_slot", "<ButtonRelease-1>", self.drop_card)
-            self.canvas.tag_bind("empty_ace_slot", "<Button1-Motion>", self.move_card)
-            self.canvas.tag_bind("empty_ace_slot", "<ButtonRelease-1>", self.drop_card)
-            self.canvas.tag_bind("empty_cardstack_slot","<Button-1>", self.refill_card_stack)
-        self.canvas.bind("<Button-1>", self.on_background)
-        
+            self.canvas.tag_bind("face_up", "<Button-1>", self.end_onclick)
+            self.canvas.tag_bind("face_up", "<Button1-Motion>", self.move_card)
+            self.canvas.tag_bind("face_up", "<ButtonRelease-1>", self.drop_card)
+            self.canvas.tag_bind("face_up", "<Enter>", self.on_draggable_card)
+            self.canvas.tag_bind("face_up", "<Leave>", self.leave_draggable_card)
+        self.canvas.tag_bind("stock", "<Button-1>", self.stack_onclick)
+        self.canvas.tag_bind("empty_cardstack_slot", "<Button-1>", self.refill_card_stack)
+
+    def card_position(self, pile, index=0):
+        return self.layout.card_position(pile, index, len(self.game.piles[pile]))
+
+    def card_bbox(self, pile, index=0):
+        return self.layout.card_bbox(pile, index, len(self.game.piles[pile]))
+
+    def pile_bbox(self, pile):
+        return self.layout.pile_bbox(pile, len(self.game.piles[pile]))
+
+    def run_bbox(self, pile, index):
+        return self.layout.run_bbox(pile, index, len(self.game.piles[pile]))
+
+    def place_slots(self):
+        layout = self.layout
+        size = layout.card_size
+        for pile in TABLEAU:
+            self.canvas.coords(self.slot_items[pile], *layout.slot_position(pile))
+            self.canvas.itemconfig(self.slot_items[pile], image=self.assets.get("empty_slot", size))
+        for pile, suit in zip(FOUNDATIONS, SUITS):
+            self.canvas.coords(self.slot_items[pile], *layout.slot_position(pile))
+            self.canvas.itemconfig(self.slot_items[pile], image=self.assets.get(f"ace_of_{suit}_slot", size))
+        for pile in (STOCK, WASTE):
+            self.canvas.coords(self.slot_items[pile], *self.rounded_points(*layout.outline_bbox(pile), layout.px(18)))
+            self.canvas.itemconfig(self.slot_items[pile], width=layout.px(3))
+
+    def resize_canvas(self, event):
+        # dragging the window edge sends a stream of <Configure> events; only
+        # the last one, once they stop, relayouts the table
+        if self.resize_job is not None:
+            self.after_cancel(self.resize_job)
+        self.resize_job = self.after(150, self.apply_resize, event.width, event.height)
+
+    def apply_resize(self, width, height):
+        self.resize_job = None
+        card_size = self.layout.card_size
+        if not self.layout.resize(width, height):
+            return
+        if self.layout.card_size != card_size:
+            self.back_of_card = self.assets.get(self.card_back, self.layout.card_size)
+            self.registry.invalidate()
+        self.place_slots()
+        self.clear_selection()
+        self.animator.finish()
+        self.render(animate=False)
+
+    def pile_at(self, x, y):
+        return self.layout.pile_at(x, y, [len(cards) for cards in self.game.piles])
 
     def on_background(self, event):
-        if (self.canvas.find_overlapping(event.x - 5, event.y - 5, event.x + 5, event.y + 5)) == ():
-            self.canvas.delete("rect")
-            self.last_active_card = ""
-            self.card_stack_list = ""
+        if self.pile_at(event.x, event.y) is None:
+            self.clear_selection()
 
     def create_rectangle(self, x1, y1, x2, y2, tag="rect", **kwargs):
         if "alpha" in kwargs:
             alpha = int(kwargs.pop("alpha") * 255)
             fill = kwargs.pop("fill")
-            fill = self.winfo_rgb(fill) + (alpha,)
-            image = Image.new("RGBA", (x2 - x1, y2 - y1), fill)
-            self.rect_images.append(ImageTk.PhotoImage(image))
-            self.canvas.create_image(x1, y1, image=self.rect_images[-1], anchor="nw", tag=tag)
+            image = self.overlays.get(x2 - x1, y2 - y1, fill, alpha)
+            self.canvas.create_image(x1, y1, image=image, anchor="nw", tag=tag)
         else:
             self.canvas.create_rectangle(x1, y1, x2, y2, tag="rect", **kwargs)
 
-    def initiate_game(self):
+
+    def initiate_game(self, elapsed=0):
+        # any player action interrupts auto-complete
+        self.stop_sending()
         self.canvas_item_hover_time = self.canvas_hover_time
-        self.restart_game_button.config(state="normal")
-        self.redo_last_move_button.config(state="normal")
-        try:
-            last_move = self.history[-1]
-        except:
-            self.undo_last_move_button.disable()
-            self.restart_game_button.disable()
-        try:
-            last_move = self.redo[-1]
-        except:
-            self.redo_last_move_button.disable()
+        self.update_history_buttons()
         if self.game_started == False:
-            self.stopwatch.start()
+            self.stopwatch.start(elapsed)
             self.game_started = True
             if self.total_redeals != "unlimited":
                 self.redeal_label.pack(side="left", padx=6, pady=4)
             self.stock_label.pack(side="left", padx=6, pady=4)
+
+    def update_history_buttons(self):
+        if self.history:
+            self.undo_last_move_button.config(state="normal")
+            self.restart_game_button.config(state="normal")
         else:
-            self.game_started = True
+            self.undo_last_move_button.disable()
+            self.restart_game_button.disable()
+        if self.redo:
+            self.redo_last_move_button.config(state="normal")
+            if self.redo_last_move_button.on_button:
+                self.redo_last_move_button.config(
+                    background=self.redo_last_move_button["activebackground"])
+        else:
+            self.redo_last_move_button.disable()
+
+    def update_labels(self):
+        self.points_label.config(text=f"Очки: {self.game.score}")
+        self.stock_label.config(text=f"Осталось карт:  {self.game.stock_left}")
+        if self.total_redeals != "unlimited":
+            self.redeal_label.config(text=f"Осталось пересдач: {self.game.redeals_left}")
+        self.update_win_chance()
+
+    def update_win_chance(self):
+        if self.win_estimator is None:
+            return
+        if self.game.won:
+            self.win_chance_label.config(text="Шанс победы: 100%")
+            return
+        self.win_chance_label.config(text="Шанс победы: …")
+        self.win_estimator.estimate(self.game)
 
+    def poll_win_chance(self):
+        if self.win_estimator is None:
+            return
+        estimate = self.win_estimator.poll()
+        if estimate is not None:
+            wins, total = estimate
+            self.win_chance_label.config(text=f"Шанс победы: {round(100 * wins / total)}%")
+        self.after(250, self.poll_win_chance)
 
     def restart_game(self, *args):
         if self.move_flag:
@@ -671,26 +754,34 @@ class SolitareGameFrame(tk.Frame):
         self.reset_vars()
         self.redraw()
 
-    def new_game(self, *args):
+    def new_game(self, *args, deal_number=None):
         if self.move_flag:
             return
-        self.shuffle_cards()
+        self.shuffle_cards(deal_number)
         self.reset_vars()
         self.redraw()
 
+    def choose_deal(self, *args):
+        if self.move_flag:
+            return
+        deal_number = simpledialog.askinteger(
+            title="Выбор игры", prompt=f"Номер игры (0–{DEAL_NUMBERS - 1}):", parent=self,
+            initialvalue=self.deal_number, minvalue=0, maxvalue=DEAL_NUMBERS - 1)
+        if deal_number is not None:
+            self.new_game(deal_number=deal_number)
+
     def reset_vars(self):
-        self.card_drawing_count = 0
-        self.cards_on_ace = 0
-        self.card_moved_to_ace_by_sender = 0
-        self.stock_left = 24
-        self.last_active_card = ""
-        self.card_stack_list = ""
+        self.stop_sending()
+        self.selected = None
+        self.hint_move = None
+        self.hint_shown = False
         self.history = []
         self.redo = []
         self.game_started = False
         self.move_flag = False
-        self.redeals_left = 0
         self.canvas_item_hover_time = self.canvas_hover_time
+        self.game.deal(self.cards)
+        self.journal.start(self.journal_header())
 
         try:
             self.stopwatch.stop()
@@ -701,604 +792,252 @@ class SolitareGameFrame(tk.Frame):
         self.restart_game_button.disable()
         self.undo_last_move_button.disable()
         self.redo_last_move_button.disable()
-        if self.total_redeals != "unlimited":
-            self.redeal_label.config(text=f"Осталось пересдач: {max(0, self.total_redeals + self.redeals_left - 1)}")
-        self.points_label.config(text=f"Очки: {self.starting_points}")
-        self.stock_label.config(text=f"Осталось карт:  {self.stock_left}")
+        self.update_labels()
         if self.total_redeals != "unlimited":
             self.redeal_label.pack_forget()
         self.stock_label.pack_forget()
+        self.animator.cancel()
         self.canvas.delete("all")
 
+    def journal_header(self):
+        return {"deal": self.deal_number, "redeals": self.game.total_redeals}
+
+    def restore_game(self, saved):
+        events = saved[1] if saved is not None else []
+        # redeals made before the rules last changed may be more than the
+        # limit allows now, so the moves are replayed without one
+        total_redeals = self.game.total_redeals
+        self.game.total_redeals = None
+        try:
+            self.history, self.redo, elapsed = replay(self.game, events)
+        except (ValueError, IndexError, KeyError, TypeError):
+            # a journal that does not fit the deal is dropped
+            self.game.deal(self.cards)
+            self.history, self.redo, elapsed, events = [], [], 0, []
+        finally:
+            self.game.total_redeals = total_redeals
+        self.journal.start(self.journal_header(), events)
+        if events:
+            self.render(animate=False)
+            self.update_labels()
+            self.initiate_game(elapsed)
+            self.stopwatch.freeze(True)
+
     def redraw(self):
         self.draw_card_slots()
-        self.generate_card_position()
-        self.draw_remaining_cards()
-
-    def find_available_cards(self):
-        face_up_cards = list(reversed(self.canvas.find_withtag("face_up")))
-        flipped_cards = []
-        positions_of_ace_rects = []
-        found_cards = []
-
-        for card in (self.canvas.find_overlapping(*self.canvas.bbox("empty_cardstack_slotb"))):
-            if card in face_up_cards:
-                face_up_cards.remove(card)
-            if "empty" not in str(self.canvas.gettags(card)):
-                flipped_cards.append(card)
-        if flipped_cards != []:
-            del flipped_cards[:-1]
-        ace_slots = self.canvas.find_withtag("empty_ace_slot")
-        for slot in ace_slots:
-            positions_of_ace_rects.append(self.canvas.bbox(slot))
-        for position in positions_of_ace_rects:
-            for card in self.canvas.find_overlapping(*position):
-                if card in face_up_cards:
-                    face_up_cards.remove(card)
-                found_cards.append(card)
-            if found_cards != []:
-                flipped_cards.append(found_cards[-1])
-            found_cards = []
-        flipped_cards.extend(face_up_cards)
-        face_up_cards = flipped_cards
-
-        base_slots = self.canvas.find_withtag("empty_slot")
-        for slot in base_slots:
-            if len(self.canvas.find_overlapping(*self.canvas.bbox(slot))) == 1:
-                face_up_cards.append(slot)
-
-        return face_up_cards
+        self.draw_cards()
+
+    def clear_selection(self):
+        self.selected = None
+        self.hint_shown = False
+        self.canvas.delete("rect")
+
+    def select(self, pile, index):
+        self.clear_selection()
+        cards = self.game.piles[pile]
+        if index is None or pile == STOCK or not self.game.is_face_up(pile, index):
+            return
+        if pile not in TABLEAU and index != len(cards) - 1:
+            return
+        self.selected = (pile, index)
+        if self.movetype == "Клик":
+            self.create_rectangle(*self.run_bbox(pile, index), fill="blue", alpha=.3)
+            self.canvas.tag_bind("rect", "<Button-1>", self.click_on_rect)
+
+    def try_move(self, src, dst, count):
+        if not self.game.can_move(src, dst, count):
+            return False
+        self.redo = []
+        self.after_move(self.game.move(src, dst, count))
+        return True
+
+    def after_move(self, record, kind="m"):
+        self.clear_selection()
+        if kind == "m":
+            self.journal.append(["m", record.src, record.dst, record.count, self.stopwatch.value])
+        else:
+            self.journal.append([kind, self.stopwatch.value])
+        self.history.append(record)
+        self.render(record.src, record.dst)
+        self.update_labels()
+        self.update_history_buttons()
+        if self.check_win():
+            return True
+        if self.send_plan is None and self.game.trivially_won:
+            self.after_idle(self.auto_complete)
+        return False
+
+    def check_win(self):
+        if not self.game.won:
+            return False
+        self.history = []
+        self.journal.clear()
+        after_game = messagebox.askyesno(title="Вы выиграли!", message="Сыграем еще раз?", icon="question")
+        if after_game:
+            self.new_game()
+        else:
+            self.parent.destroy()
+        return True
 
     def generate_hint(self, *args):
         if self.move_flag:
             return
         self.initiate_game()
-        self.card_stack_list = ""
-        self.last_active_card = ""
-        self.canvas.delete("rect")
-        face_up_cards = self.find_available_cards()
-        returnval = False
-        for pair in face_up_cards:
-            self.canvas.delete("rect")
-            card_stack = list(self.canvas.bbox(pair))
-            card_stack[1] = (int(card_stack[1])) + 129
-            card_stack[3] = (int(card_stack[3])) + 350
-            card_stack = tuple(card_stack)
-            card_stack = list(self.canvas.find_overlapping(*card_stack))
-            for pair in self.card_stack_list:
-                card_tag = self.canvas.gettags(pair)
-                if ("ace_slot" in str(card_tag)) or ("cardstack" in str(card_tag)):
-                    to_be_card_stack_list = card_stack[-1]
-                    card_stack = []
-                    card_stack.append(to_be_card_stack_list)
-                    break
-            last_active_card_bbox_list = list(self.canvas.bbox(pair))
-            last_active_card_bbox_list[1] = int(last_active_card_bbox_list[1]) + 60
-            last_active_card_bbox_list[3] = int(last_active_card_bbox_list[3]) - 25
-            last_active_card_bbox_list = tuple(last_active_card_bbox_list)
-            card_a_bbox = self.canvas.bbox(pair)
-            first_item = list(self.canvas.bbox(self.canvas.find_withtag(card_stack[0])))
-            last_item = list(self.canvas.bbox(self.canvas.find_withtag(card_stack[-1])))
-            tl = first_item[0]
-            tr = first_item[1]
-            bl = last_item[2]
-            br = last_item[3]
-            positionsb = []
-            positionsb.append(tl)
-            positionsb.append(tr)
-            positionsb.append(bl)
-            positionsb.append(br)
-            card_a_bbox = tuple(positionsb)
-
-            if ("empty_ace_slot" not in str(self.canvas.gettags(pair)) and "empty_slot" not in str(self.canvas.gettags(pair))):
-                last_active_card = str(self.canvas.gettags(pair)).replace(")", "").replace(
-                    "('", "").replace("', 'face_down'", "").replace("', 'face_up'", "")
-            else:
-                continue
-            for card in face_up_cards:
-                card_tag = str(self.canvas.gettags(card))
-                current_image = self.canvas.find_withtag(card)
-                current_image_tags = self.canvas.gettags(current_image)
-                current_image_bbox = self.canvas.bbox(current_image)
-
-                bbox_list = list(current_image_bbox)
-                card_b_bbox = self.canvas.bbox(card)
-                current_image_overlapping = self.canvas.find_overlapping(*bbox_list)
-                tag_a = str(current_image_tags).replace(", 'current')", "").replace(")", "").replace(
-                    "('", "").replace("', 'face_down'", "").replace("', 'face_up'", "")
-
-                overlapping = False
-                ace_slot = False
-                if ("empty_ace_slot" not in str(current_image_tags)) and ("empty_slot" not in str(current_image_tags)):
-                    csl = list(self.canvas.bbox(tag_a))
-                    csl[1] = (int(csl[1])) + 135
-                    csl[3] = (int(csl[3])) + 20
-                    csl = tuple(csl)
-                    csl = list(self.canvas.find_overlapping(*csl))
-                    for card in csl:
-                        if card in card_stack:
-                            continue
-                        elif "empty_cardstack_slot" in str(self.canvas.gettags(card)):
-                            overlapping = True
-                            break
-                        elif "face_up" in self.canvas.gettags(card):
-                            overlapping = True
-                            break
-
-                if "empty_slot" in str(current_image_tags):
-                    if "king" in card_stack:
-                        for card in current_image_overlapping:
-                            if card in card_stack:
-                                continue
-                            elif "face" in str(self.canvas.gettags(card)):
-                                overlapping = True
-                                break
-
-                for item in current_image_overlapping:
-                    if "empty_ace_slot" in self.canvas.gettags(self.canvas.find_withtag(item)):
-                        ace_slot = True
-                for item in self.canvas.find_overlapping(*self.canvas.bbox(pair)):
-                    if "empty_ace_slot" in self.canvas.gettags(self.canvas.find_withtag(item)):
-                        ace_slot = True
-
-                for item in current_image_overlapping:
-                    if last_active_card in self.canvas.gettags(self.canvas.find_withtag(item)):
-                        overlapping = True
-
-                if ace_slot:
-                    try:
-                        for item in card_stack:
-                            self.canvas.tag_raise(item)
-                        item = self.canvas.find_overlapping(
-                            *self.canvas.bbox(self.canvas.find_above(last_active_card)))
-                        overlapping = True
-                    except:
-                        pass
-                else:
-                    try:
-                        below_last = self.canvas.find_overlapping(
-                            *self.canvas.bbox(last_active_card))
-                    except:
-                        continue
-                    last_card_index_in_below = below_last.index(
-                        list(self.canvas.find_withtag(last_active_card))[0])
-                    below_last = str(self.canvas.gettags(
-                        below_last[last_card_index_in_below-1]))
-                    last_overlapping = self.canvas.find_overlapping(
-                        *self.canvas.bbox(last_active_card))
-                    if "king" in last_active_card:
-                        if ("empty_slot" in below_last):
-                            overlapping = True
-                    over_cardstack = False
-                    for card in current_image_overlapping:
-                        if "empty_cardstack_slot" in str(self.canvas.gettags(card)):
-                            over_cardstack = True
-                            break
-                    if not over_cardstack:
-                        over_cardstack = False
-                        for card in last_overlapping:
-                            if "empty_cardstack_slot" in str(self.canvas.gettags(card)):
-                                over_cardstack = True
-                        if not over_cardstack:
-                            if "face_up" in below_last:
-                                overlapping = True
-                    else:
-                        overlapping = True
-                if ("ace" not in last_active_card and "empty_ace_slot" in current_image_tags):
-                    continue
-                elif ("king" not in last_active_card and "empty_slot" in current_image_tags):
-                    continue
-                elif "empty_slot" in last_active_card:
-                    continue
-                elif overlapping:
-                    continue
-                elif "king" in last_active_card and "empty_slot" in current_image_tags:
-                    returnval = True
-                    break
-                elif self.check_move_validity(tag_a, last_active_card, ace_slot):
-                    returnval = True
-                    break
-                else:
-                    continue
-            if returnval:
-                break
-
-        if returnval:
-            self.create_rectangle(*card_b_bbox, fill="green", alpha=.5)
-            self.create_rectangle(*card_a_bbox, fill="green", alpha=.5)
+        self.clear_selection()
+        # the heuristic move is shown at once, and replaced if the solver
+        # finds a winning line that starts differently before the deadline
+        self.hint_move = self.game.hint()
+        if self.hint_move is not None:
+            self.show_hint()
+        self.hint_key = self.game.state_key
+        self.hint_deadline = time.monotonic() + self.hint_time
+        self.hint_request = self.hint_worker.search(self.game, self.hint_time)
+        self.poll_hint(self.hint_request)
+
+    def poll_hint(self, request):
+        if request != self.hint_request:
+            return
+        if self.game.state_key != self.hint_key:
+            # the board changed, so whatever comes back is stale
+            self.hint_request = None
+            return
+        result = self.hint_worker.poll(request)
+        if self.move_flag or result is None and time.monotonic() < self.hint_deadline:
+            # keep waiting, and never draw over a card being dragged
+            self.after(50, self.poll_hint, request)
+            return
+        self.hint_request = None
+        move = result[1] if result is not None else None
+        if self.hint_move is None:
+            self.hint_move = move
+            self.show_hint()
+        elif move is not None and move != self.hint_move and self.hint_shown:
+            # the first hint is still up, so the winning line replaces it
+            self.hint_move = move
+            self.show_hint()
+
+    def show_hint(self):
+        self.clear_selection()
+        move = self.hint_move
+        if move is not None and STOCK in move[:2]:
+            self.create_rectangle(*self.card_bbox(STOCK), fill="purple", alpha=.5)
+            self.canvas.tag_bind("rect", "<Button-1>", self.click_on_hint_rect)
+            self.hint_shown = True
+        elif move is not None:
+            src, dst, count = move
+            self.create_rectangle(*self.run_bbox(src, len(self.game.piles[src]) - count), fill="green", alpha=.5)
+            self.create_rectangle(*self.pile_bbox(dst), fill="green", alpha=.5)
 
             if self.movetype == "Клик":
                 self.canvas.tag_bind("rect", "<Button-1>", self.click_on_hint_rect)
             else:
                 self.canvas.tag_bind("rect", "<Enter>", self.enter_on_hint_rect)
+            self.hint_shown = True
+        elif self.game.piles[STOCK] or self.game.piles[WASTE]:
+            messagebox.showinfo(
+                title="Нет доступных ходов", message="Не могу ничего посоветовать.\nЛучше начать новую игру.")
         else:
-            ret = False
-            if self.total_redeals != "unlimited":
-                if self.stock_left == 0 and (self.total_redeals + self.redeals_left - 1) <= 0:
-                    ret = True
-                    messagebox.showinfo(
-                        title="Нет доступных ходов", message="Не могу ничего посоветовать.\nЛучше начать новую игру.")
-            if not ret:
-                cards = False
-                for card in self.canvas.find_overlapping(*self.canvas.bbox("empty_cardstack_slotb")):
-                    if "empty_cardstack_slotb" in self.canvas.gettags(card):
-                        continue
-                    cards = True
-                    break
-                if not cards:
-                    for card in self.canvas.find_overlapping(*self.canvas.bbox("empty_cardstack_slot")):
-                        if "empty_cardstack_slot" in self.canvas.gettags(card):
-                            continue
-                        cards = True
-                        break
-                if not cards:
-                    ret = True
-                    messagebox.showinfo(
-                        title="Хммм", message="Не могу подсказать ход.\nЛучше начать игру заново.")
-
-            if not ret:
-                self.create_rectangle(
-                    *self.canvas.bbox("empty_cardstack_slot"), fill="purple", alpha=.5)
-
-                if self.movetype == "Клик":
-                    self.canvas.tag_bind("rect", "<Button-1>", self.click_on_hint_rect)
-                else:
-                    self.canvas.tag_bind("rect", "<Button-1>", self.click_on_hint_rect)
-         
-    def send_cards_up(self, *args):
+            messagebox.showinfo(
+                title="Хммм", message="Не могу подсказать ход.\nЛучше начать игру заново.")
+
+    def send_cards_up(self, *args, safe_only=False):
         if self.move_flag:
             return
+        if self.send_plan is not None:
+            # pressing F5 again stops the playback
+            self.stop_sending()
+            return
         self.initiate_game()
-        self.card_stack_list = ""
-        self.last_active_card = ""
-        self.canvas.delete("rect")
+        self.clear_selection()
+        plan = self.game.foundation_plan(safe_only)
+        if not plan:
+            return
+        self.send_plan = plan[::-1]
         self.stopwatch.freeze(False)
-        face_up_cards = list(reversed(self.canvas.find_withtag("face_up")))
-        for card in face_up_cards:
-            below_last = self.canvas.find_overlapping(*self.canvas.bbox(card))
-            last_card_index_in_below = below_last.index(
-                list(self.canvas.find_withtag(card))[0])
-            below_last = str(self.canvas.gettags(
-                below_last[last_card_index_in_below - 1]))
-            if "face_up" in self.canvas.gettags(below_last):
-                face_up_cards.remove(card)
-        flipped_cards = []
-        for card in (self.canvas.find_overlapping(*self.canvas.bbox("empty_cardstack_slotb"))):
-            if card in face_up_cards:
-                face_up_cards.remove(card)
-            if "empty" not in str(self.canvas.gettags(card)):
-                flipped_cards.append(card)
-        if flipped_cards != []:
-            del flipped_cards[:-1]
-        flipped_cards.extend(face_up_cards)
-        face_up_cards = flipped_cards
-        cards_moved = self.card_moved_to_ace_by_sender
-        over_ace = []
-        temp_over_ace = []
-        for item in self.canvas.find_withtag("empty_ace_slot"):
-            temp_over_ace = []
-            for card in self.canvas.find_overlapping(*self.canvas.bbox(item)):
-                temp_over_ace.append(card)
-                if card in face_up_cards:
-                    face_up_cards.remove(card)
-            over_ace.append(temp_over_ace[-1])
-        self.cardsender_may_continue = True
-        for pair in over_ace:
-            for card in face_up_cards:
-                if pair == card:
-                    continue
-                self.change_current(card)
-                self.end_onclick(event="send_cards_to_ace")
-                self.canvas.dtag("current")
-                self.change_current(pair)
-                self.card_onclick(event="send_cards_to_ace")
-                self.canvas.dtag("current")
-                self.card_stack_list = ""
-                self.last_active_card = ""
-                self.canvas.delete("cardsender_highlight")
-                self.update_idletasks()
+        self.send_job = self.after_idle(self.send_next)
+
+    def send_safe_cards_up(self, *args):
+        self.send_cards_up(safe_only=True)
+
+    def auto_complete(self):
+        # a board with nothing hidden left finishes itself
+        if self.send_plan is None and not self.move_flag and self.game.trivially_won and not self.game.won:
+            self.send_cards_up()
+
+    def send_next(self, highlighted=False):
+        # one step of the planned playback: highlight the source pile, then
+        # move the card after wait_before_send, without blocking the event loop
+        self.canvas.delete("cardsender_highlight")
+        src, dst, count = self.send_plan[-1]
+        if not highlighted:
+            self.create_rectangle(*self.pile_bbox(src), fill="blue", tag="cardsender_highlight", alpha=.5)
+            self.send_job = self.after(self.wait_before_send, self.send_next, True)
+            return
+        self.send_plan.pop()
+        if not self.game.can_move(src, dst, count):
+            self.stop_sending()
+            return
+        self.redo = []
+        if self.after_move(self.game.move(src, dst, count)) or self.send_plan is None:
+            return
+        if self.send_plan:
+            self.send_job = self.after_idle(self.send_next)
+        else:
+            self.stop_sending()
 
-                if not self.cardsender_may_continue:
-                    return
-        if self.cardsender_may_continue:
-            if cards_moved != self.card_moved_to_ace_by_sender:
-                self.send_cards_up()
-            else:
-                self.card_moved_to_ace_by_sender = 0
-                self.stopwatch.freeze(True)
+    def stop_sending(self, *args):
+        if self.send_plan is None:
+            return
+        if self.send_job is not None:
+            self.after_cancel(self.send_job)
+        self.send_plan = None
+        self.send_job = None
+        self.canvas.delete("cardsender_highlight")
+        self.stopwatch.freeze(True)
 
     def redo_move(self, *args):
-        if self.move_flag:
-            return
-        try:
-            last_move = self.redo[-1]
-        except:
+        if self.move_flag or not self.redo:
             return
-        self.last_active_card = ""
-        self.card_stack_list = ""
-        self.canvas.delete("rect")
-        del self.redo[-1]
+        self.clear_selection()
         self.initiate_game()
-
-        if "refill_card_stack" in last_move:
-            self.refill_card_stack(event="redo")
-        elif "stack_click_move" in last_move:
-            self.stack_onclick(event="redo")
-        else:
-            if "move_card" in last_move:
-                last_active_card = list(last_move[2])[0]
-            else:
-                last_active_card = last_move[3]
-            self.change_current(last_active_card)
-            self.end_onclick(event="redo")
-            self.canvas.dtag("current")
-            if "empty" in str(last_move[-1]):
-                last_move[-1] = list(str(last_move[-1]).split("'"))[0]
-            self.change_current(last_move[-1])
-            self.card_onclick(event="redo")
-            self.canvas.dtag("current")
-        self.initiate_game()
-        try:
-            last_move = self.redo[-1]
-            self.redo_last_move_button.config(state="normal")
-            if self.redo_last_move_button.on_button:
-                self.redo_last_move_button.config(
-                    background=self.redo_last_move_button["activebackground"])
-        except:
-            self.redo_last_move_button.disable()
-
-    def change_current(self, tag):
-        self.canvas.dtag("current")
-        self.canvas.focus("")
-        self.canvas.addtag_withtag("current", tag)
+        self.after_move(self.game.redo(self.redo.pop()), "r")
 
     def undo_move(self, *args):
         if self.move_flag:
             return
-        self.last_active_card = ""
-        self.card_stack_list = ""
-        self.canvas.delete("rect")
+        self.clear_selection()
         self.initiate_game()
-        try:
-            last_move = self.history[-1]
-        except:
+        if not self.history:
             return
+        last_move = self.history.pop()
+        self.game.undo(last_move)
+        self.journal.append(["u", self.stopwatch.value])
         self.redo.append(last_move)
-        del self.history[-1]
-        if "refill_card_stack" in last_move:
-            self.redeals_left += 1
-            if self.total_redeals != "unlimited":
-                self.redeal_label.config(
-                    text=f"Осталось пересдач: {max(0, self.total_redeals + self.redeals_left - 1)}")
-            for card in reversed(list(self.canvas.find_overlapping(*self.canvas.bbox("empty_cardstack_slot")))):
-                current_item_tags = self.canvas.gettags(card)
-                tag_a = current_item_tags[0]
-                if "empty_cardstack_slot" in (self.canvas.gettags(card)):
-                    continue
-                self.canvas.tag_unbind(tag_a, "<Enter>")
-                self.canvas.tag_unbind(tag_a, "<Leave>")
-                self.canvas.tag_unbind(tag_a, "<Button-1>")
-                if self.movetype == "Клик":
-                    self.canvas.tag_bind(
-                        tag_a, "<Button-1>", self.card_onclick)
-                else:
-                    self.canvas.tag_bind(tag_a, "<Button-1>", self.end_onclick)
-                    self.canvas.tag_bind(
-                        tag_a, "<Button1-Motion>", self.move_card)
-                    self.canvas.tag_bind(
-                        tag_a, "<ButtonRelease-1>", self.drop_card)
-                    self.canvas.tag_bind(
-                        tag_a, "<Enter>", self.on_draggable_card)
-                    self.canvas.tag_bind(
-                        tag_a, "<Leave>", self.leave_draggable_card)
-                self.canvas.tag_raise(card)
-                self.canvas.move(card, 115, 0)
-                self.canvas.itemconfig(card, image=self.dict_of_cards[tag_a], tag=(tag_a, "face_up"))
-                self.stock_left -= 1
-            self.stock_label.config(text=f"Осталось карт:  {self.stock_left}")
-            self.undo_last_move_button.config(state="normal")
-            self.restart_game_button.config(state="normal")
-            self.redo_last_move_button.disable()
-
-        elif "stack_click_move" in last_move:
-            self.canvas.delete("rect")
-            self.stock_left += 1
-            self.stock_label.config(text=f"Осталось карт:  {(self.stock_left)}")
-            tag_a = last_move[0]
-            self.canvas.move(tag_a, -115, 0)
-            self.canvas.itemconfig(
-                tag_a, image=self.back_of_card, tag=(tag_a, "face_down"))
-            self.canvas.tag_unbind(tag_a, "<Enter>")
-            self.canvas.tag_unbind(tag_a, "<Leave>")
-            self.canvas.tag_unbind(tag_a, "<Button-1>")
-            self.canvas.tag_bind(tag_a, "<Button-1>", self.stack_onclick)
-            self.canvas.tag_raise(self.canvas.find_withtag(tag_a))
-
-        elif "move_card" in last_move:
-            card_tags = last_move[-2]
-            self.canvas.itemconfig(card_tags, image=self.back_of_card,
-                                   tag=(card_tags, "face_down"))
-            self.canvas.tag_unbind(card_tags, "<Enter>")
-            self.canvas.tag_unbind(card_tags, "<Leave>")
-            self.canvas.tag_unbind(card_tags, "<Button-1>")
-            for i in last_move[2]:
-                card_location = self.canvas.coords(i)
-                current_location = last_move[2][i]
-                xpos = int(current_location[0]) - int(card_location[0])
-                ypos = (int(current_location[1]) - int(card_location[1]))
-                self.canvas.move(i, xpos, ypos)
-                if True in last_move:
-                    self.canvas.tag_raise(i)
-            if last_move[1] == 1:
-                self.cards_on_ace -= 1
-                for i in last_move[2]:
-                    self.canvas.tag_raise(i)
-                self.points_label["text"] = (f"Очки: {(self.cards_on_ace * self.point_increment) + self.starting_points}")
-            elif last_move[1] == 2:
-                self.cards_on_ace += 1
-                self.points_label["text"] = (f"Очки: {(self.cards_on_ace * self.point_increment) + self.starting_points}")
-
-        elif "move_card_srv" in last_move:
-            card_location = self.canvas.coords(last_move[3])
-            current_image_location = last_move[-2]
-            
-            if last_move[1]:
-                current_image_location = self.canvas.coords(last_move[1])
-                    
-            xpos = int(current_image_location[0]) - int(card_location[0])
-            ypos = (int(current_image_location[1]) - int(card_location[1]))
-            self.canvas.move(last_move[3], xpos, ypos)
-            self.canvas.tag_raise(last_move[3])
-
-            if last_move[2] == 1:
-                self.cards_on_ace -= 1
-                self.points_label["text"] = (f"Очки: {(self.cards_on_ace * self.point_increment) + self.starting_points}")
-            elif last_move[2] == 2:
-                self.cards_on_ace += 1
-                self.points_label["text"] = (f"Очки: {(self.cards_on_ace * self.point_increment) + self.starting_points}")
-        self.canvas.tag_raise("face_up")
-        self.restart_game_button.config(state="normal")
-        self.redo_last_move_button.config(state="normal")
-        try:
-            last_move = self.history[-1]
-        except:
-            self.undo_last_move_button.disable()
-            self.restart_game_button.disable()
-
-
-    def check_move_validity(self, current_card, last_card, ace_slot):
-        card_values = {
-            "j": "11",
-            "q": "12",
-            "k": "13",
-            "a": "1"
-        }        
-        if ace_slot:
-            if "clubs" in current_card and "clubs" not in last_card:
-                return False
-            if "spades" in current_card and "spades" not in last_card:
-                return False
-            if "diamonds" in current_card and "diamonds" not in last_card:
-                return False
-            if "hearts" in current_card and "hearts" not in last_card:
-                return False
-        else:
-            if (("clubs" in current_card) or ("spades" in current_card)) and (("clubs" in last_card) or ("spades" in last_card)):
-                return False
-            elif (("diamonds" in current_card) or ("hearts" in current_card)) and (("diamonds" in last_card) or ("hearts" in last_card)):
-                return False
-        if "empty_ace_slot" in current_card:
-            return True
-        else:
-            if last_card[1] == "0":
-                last_card = "10"
-            else:
-                last_card = last_card[0]
-
-            if current_card[1] == "0":
-                current_card = "10"
-            else:
-                current_card = current_card[0]
-
-            last_card = card_values.get(last_card, last_card)  
-            current_card = card_values.get(current_card, current_card)
-            last_card = int(last_card)
-            current_card = int(current_card)
+        self.render(last_move.src, last_move.dst)
+        self.update_labels()
+        self.update_history_buttons()
 
-            if ace_slot:
-                if last_card - 1 == current_card:
-                    return True
-                else:
-                    return False
-            else:
-                if last_card + 1 == current_card:
-                    return True
-                else:
-                    return False
-
-    def stack_onclick(self, event):
+    def stack_onclick(self, event=None):
         if self.move_flag:
             return
         self.initiate_game()
-        current_item = list(self.canvas.find_overlapping(
-            *self.canvas.bbox("empty_cardstack_slot")))[-1]
-        current_item_tags = self.canvas.gettags(current_item)
-        tag_a = current_item_tags[0]
-        if event != "redo":
-            self.redo = []
-            if "empty_cardstack_slot" in tag_a:
-                return
-            elif event != "hint":
-                if current_item not in self.canvas.find_withtag("current"):
-                    return
-            elif "rect" in tag_a:
-                return
-        else:
-            if "empty_cardstack_slot" in tag_a:
-                return
-
-        self.canvas.delete("rect")
-        self.stock_left -= 1
-        self.stock_label.config(text=f"Осталось карт:  {self.stock_left}")
-        self.last_active_card = ""
-        self.card_stack_list = ""
-        history_to_add = [tag_a, "stack_click_move"]
-        self.history.append(history_to_add)
-        self.canvas.move(current_item, 115, 0)
-        self.canvas.itemconfig(current_item, image=self.dict_of_cards[tag_a], tag=(tag_a, "face_up"))
-        self.canvas.tag_unbind(tag_a, "<Button-1>")
-        if self.movetype == "Клик":
-            self.canvas.tag_bind(tag_a, "<Button-1>", self.card_onclick)
-        else:
-            self.canvas.tag_bind(tag_a, "<Button-1>", self.end_onclick)
-            self.canvas.tag_bind(tag_a, "<Button1-Motion>", self.move_card)
-            self.canvas.tag_bind(tag_a, "<ButtonRelease-1>", self.drop_card)
-            self.canvas.tag_bind(tag_a, "<Enter>", self.on_draggable_card)
-            self.canvas.tag_bind(tag_a, "<Leave>", self.leave_draggable_card)
-
-        self.canvas.tag_raise(self.canvas.find_withtag(tag_a))
-        self.undo_last_move_button.config(state="normal")
-        self.restart_game_button.config(state="normal")
-        self.redo_last_move_button.disable()
+        if not self.game.can_draw():
+            return
+        self.redo = []
+        self.after_move(self.game.draw())
 
-    def refill_card_stack(self, event):
+    def refill_card_stack(self, event=None):
         if self.move_flag:
             return
-        if event != "redo":
-            self.redo = []
         self.initiate_game()
-        self.canvas.delete("rect")
-        ret = False
-        if self.total_redeals != "unlimited":
-            if (self.total_redeals + self.redeals_left - 1) <= 0:
+        self.clear_selection()
+        if not self.game.can_redeal():
+            if self.game.piles[WASTE] and not self.game.piles[STOCK]:
                 messagebox.showinfo(title="Пересдачи закончились :(",
                                     message="Пересдать карты можно только 3 раза. Начните новую игру.")
-                ret = True
-        if not ret:
-            history_to_add = ["refill_card_stack"]
-            self.history.append(history_to_add)
-            self.redeals_left -= 1
-            if self.total_redeals != "unlimited":
-                self.redeal_label.config(text=f"Осталось пересдач: {max(0, self.total_redeals + self.redeals_left - 1)}")
-
-            for card in reversed(list(self.canvas.find_overlapping(*self.canvas.bbox("empty_cardstack_slotb")))):
-                if "empty_cardstack_slotb" in self.canvas.gettags(card):
-                    continue
-                card = self.canvas.gettags(card)[0]
-                self.canvas.tag_unbind(card, "<Button-1>")
-                self.canvas.tag_unbind(card, "<Enter>")
-                self.canvas.tag_unbind(card, "<Leave>")
-                self.canvas.tag_bind(card, "<Button-1>", self.stack_onclick)
-                self.canvas.tag_raise(card)
-                self.canvas.move(card, -115, 0)
-                self.canvas.itemconfig(card, image=self.back_of_card, tag=(card, "face_down"))
-            self.stock_left -= 1
-            for i in (self.canvas.find_overlapping(*self.canvas.bbox("empty_cardstack_slot"))):
-                self.stock_left += 1
-            self.stock_label.config(text=f"Осталось карт: {self.stock_left}")
-            self.undo_last_move_button.config(state="normal")
-            self.restart_game_button.config(state="normal")
-            self.redo_last_move_button.config(state="disabled")
+            return
+        self.redo = []
+        self.after_move(self.game.redeal())
 
     def on_draggable_card(self, event):
         if self.canvas["cursor"] != "fleur":
@@ -1308,599 +1047,119 @@ class SolitareGameFrame(tk.Frame):
         if self.canvas["cursor"] != "fleur":
             self.canvas.config(cursor="")
 
+    def card_onclick(self, event):
+        self.initiate_game()
+        target = self.pile_at(event.x, event.y)
+        if target is None:
+            return
+        pile, index = target
+        if self.selected is not None:
+            src, src_index = self.selected
+            if self.try_move(src, pile, len(self.game.piles[src]) - src_index):
+                return
+        self.select(pile, index)
+
+    def end_onclick(self, event):
+        self.initiate_game()
+        # a card still sliding into place is picked up from its target
+        self.animator.finish()
+        target = self.pile_at(event.x, event.y)
+        self.clear_selection()
+        if target is not None:
+            self.select(*target)
+        if self.selected is not None:
+            self.canvas.config(cursor="fleur")
+            self.drag_origin = self.mouse_xpos, self.mouse_ypos = event.x, event.y
+
     def move_card(self, event):
-        self.canvas.delete("available_card_rect")
-        self.canvas.delete("rect")
-        if self.move_flag:
-            new_xpos, new_ypos = event.x, event.y
-            self.canvas.move("moveable", new_xpos - self.mouse_xpos, new_ypos - self.mouse_ypos)
-            self.mouse_xpos = new_xpos
-            self.mouse_ypos = new_ypos
-            self.highlight_available_cards()
-        else:
-            for item in self.card_stack_list:
-                card_tag = list(self.canvas.gettags(item))[0]
-                if "empty" in str(self.canvas.gettags(item)):
-                    continue
-                elif "face_down" in str(self.canvas.gettags(item)):
-                    continue
-                else:
-                    self.canvas.addtag_withtag("moveable", card_tag)
-            self.move_flag = True
+        if self.selected is None:
+            return
+        if not self.move_flag:
+            pile, index = self.selected
+            for card in self.game.piles[pile][index:]:
+                self.canvas.addtag_withtag("moveable", self.registry.items[card])
             self.canvas.tag_raise("moveable")
-            self.mouse_xpos = event.x
-            self.mouse_ypos = event.y
-
-    def highlight_available_cards(self):
-        try:
-            last_image_location = self.current_image_location
-            returnval = True
-            bbox = list(self.canvas.bbox(self.canvas.find_withtag("current")))
-            bbox[0] = int(bbox[0]) - 15
-            bbox[1] = int(bbox[1]) - 15
-            bbox[2] = int(bbox[2]) + 15
-            bbox[3] = int(bbox[3]) + 15
-            card_overlapping = self.canvas.find_overlapping(*tuple(bbox))
-        except:
+            self.move_flag = True
+            self.start_drag(pile, index)
+        self.canvas.move("moveable", event.x - self.mouse_xpos, event.y - self.mouse_ypos)
+        self.mouse_xpos = event.x
+        self.mouse_ypos = event.y
+        self.highlight_drop_target()
+
+    def start_drag(self, pile, index):
+        # the board cannot change while a run is dragged, so its legal
+        # destinations and their rectangles are worked out once, here
+        count = len(self.game.piles[pile]) - index
+        self.drag_bbox = self.card_bbox(pile, index)
+        self.drop_targets = [(dst, self.pile_bbox(dst)) for dst in self.game.targets(pile, count)]
+        self.drop_target = None
+
+    def find_drop_target(self):
+        x1, y1, x2, y2 = self.drag_bbox
+        dx = self.mouse_xpos - self.drag_origin[0]
+        dy = self.mouse_ypos - self.drag_origin[1]
+        margin = self.layout.px(15)
+        x1, y1, x2, y2 = x1 + dx - margin, y1 + dy - margin, x2 + dx + margin, y2 + dy + margin
+        target = None
+        best_area = 0
+        for dst, (tx1, ty1, tx2, ty2) in self.drop_targets:
+            area = max(0, min(x2, tx2) - max(x1, tx1)) * max(0, min(y2, ty2) - max(y1, ty1))
+            if area > best_area:
+                target = dst
+                best_area = area
+        return target
+
+    def highlight_drop_target(self):
+        target = self.find_drop_target()
+        if target == self.drop_target:
             return
-        for card in card_overlapping:
-            if (self.canvas.find_withtag("current")) == card:
-                continue
-            card_tag = str(self.canvas.gettags(card))
-            if "face_down" in card_tag:
-                continue
-            elif "current" in card_tag:
-                continue
-            elif "empty_cardstack_slot" in card_tag:
-                break
-            else:
-                current_image = self.canvas.find_withtag(card)
-                current_image_bbox = self.canvas.bbox(current_image)
-                returnval = self.generate_returnval(current_image)
-                if returnval:
-                    self.create_rectangle(*current_image_bbox, fill="blue", alpha=.3, tag="available_card_rect")
-                    for card in self.card_stack_list:
-                        if "empty_slot" not in self.canvas.gettags(card):
-                            self.canvas.tag_raise(card)
-                    continue
+        self.drop_target = target
+        self.canvas.delete("available_card_rect")
+        if target is not None:
+            self.create_rectangle(*self.pile_bbox(target), fill="blue", alpha=.3, tag="available_card_rect")
+            self.canvas.tag_raise("moveable")
 
     def drop_card(self, event):
         if self.canvas["cursor"] == "fleur":
             self.canvas.config(cursor="hand2")
         self.canvas.delete("available_card_rect")
+        self.canvas.dtag("moveable")
+        dragged = self.move_flag
         self.move_flag = False
-        self.canvas.dtag("face_up", "moveable")
-        try:
-            last_image_location = self.current_image_location
-            returnval = True
-            bbox = list(self.canvas.bbox(self.canvas.find_withtag("current")))
-            bbox[0] = int(bbox[0]) - 15
-            bbox[1] = int(bbox[1]) - 15
-            bbox[2] = int(bbox[2]) + 15
-            bbox[3] = int(bbox[3]) + 15
-            card_overlapping = self.canvas.find_overlapping(*tuple(bbox))
-        except:
-            moving_count = 0
-            for item in self.card_stack_list:
-                if "empty" in str(self.canvas.gettags(item)):
-                    continue
-                elif "face_down" in str(self.canvas.gettags(item)):
-                    continue
-                else:
-                    xpos = int(last_image_location[0]) - int(self.canvas.coords(item)[0])
-                    ypos = moving_count + (int(last_image_location[1]) - int(self.canvas.coords(item)[1]))
-                    self.canvas.move(item, xpos, ypos)
-                    moving_count += 20
+        if self.selected is None:
             return
-        for card in card_overlapping:
-            card_tag = str(self.canvas.gettags(card))
-            if "face_down" in card_tag:
-                continue
-            elif "current" in card_tag:
-                continue
-            elif "empty_cardstack_slot" in card_tag:
-                break
-            else:
-                self.current_image = current_image = self.canvas.find_withtag(card)
-                self.current_image_tags = current_image_tags = self.canvas.gettags(current_image)
-                self.current_image_location = self.canvas.coords(current_image)
-                self.current_image_bbox = current_image_bbox = self.canvas.bbox(current_image)
-                bbox_list = list(current_image_bbox)
-                current_image_overlapping = self.canvas.find_overlapping(*bbox_list)
-                self.tag_a = tag_a = str(current_image_tags).replace(", 'current')", "").replace(
-                    ")", "").replace("('", "").replace("', 'face_down'", "").replace("', 'face_up'", "")
-                overlapping = False
-                ace_slot = False
-                over_ace_slot = False
-                for card in self.canvas.find_overlapping(*self.canvas.bbox(current_image)):
-                    if "empty_ace_slot" in self.canvas.gettags(card):
-                        over_ace_slot = True
-                        break
-                if (not over_ace_slot) and ("empty_slot" not in str(current_image_tags)):
-                    csl = list(self.canvas.bbox(tag_a))
-                    csl[1] = (int(csl[1])) + 135
-                    csl[3] = (int(csl[3])) + 20
-                    csl = tuple(csl)
-                    csl = list(self.canvas.find_overlapping(*csl))
-                    for card in csl:
-                        if card in self.card_stack_list:
-                            continue
-                        elif "empty_cardstack_slot" in str(self.canvas.gettags(card)):
-                            overlapping = True
-                            break
-                        elif "face_up" in self.canvas.gettags(card):
-                            overlapping = True
-                            break
-
-                if "empty_slot" in str(self.current_image_tags):
-                    if "king" in self.last_active_card:
-                        for card in current_image_overlapping:
-                            if card in self.card_stack_list:
-                                continue
-                            elif "face" in str(self.canvas.gettags(card)):
-                                overlapping = True
-                                break
-
-                for item in current_image_overlapping:
-                    if "empty_ace_slot" in self.canvas.gettags(self.canvas.find_withtag(item)):
-                        ace_slot = True
-
-                if ace_slot:
-                    try:
-                        for item in self.card_stack_list:
-                            self.canvas.tag_raise(item)
-                        item = self.canvas.find_overlapping(*self.canvas.bbox(self.canvas.find_above(self.last_active_card)))
-                        overlapping = True
-                    except:
-                        pass
-
-                try:
-                    if str(list(current_image)[0]) == str(self.last_active_card_over[self.last_active_card_over.index(list(self.canvas.find_withtag(self.last_active_card))[0])-1]):
-                        overlapping = True
-                except (ValueError, IndexError):
-                    pass
-                
-                if "ace" not in self.last_active_card and "empty_ace_slot" in self.current_image_tags:
-                    continue
-                elif "king" not in self.last_active_card and "empty_slot" in self.current_image_tags:
-                    continue
-                elif "empty_slot" in self.last_active_card:
-                    continue
-                elif overlapping:
-                    continue
-                elif "king" in self.last_active_card and "empty_slot" in self.current_image_tags:
-                    self.continue_onclick(ace_slot=ace_slot, event=event)
-                    returnval = False
-                    break
-                elif self.check_move_validity(tag_a, self.last_active_card, ace_slot):
-                    self.continue_onclick(ace_slot=ace_slot, event=event)
-                    returnval = False
-                    break
-                else:
-                    continue
-
-        if returnval:
-            moving_count = 0
-            for item in self.card_stack_list:
-                if "empty" in str(self.canvas.gettags(item)):
-                    continue
-                elif "face_down" in str(self.canvas.gettags(item)):
-                    continue
-                else:
-                    xpos = int(last_image_location[0]) - int(self.canvas.coords(item)[0])
-                    ypos = moving_count + (int(last_image_location[1]) - int(self.canvas.coords(item)[1]))
-                    self.canvas.move(item, xpos, ypos)
-                    moving_count += 20
-        self.card_stack_list = ""
-        self.canvas.delete("rect")
-        self.last_active_card = ""
-
-    def generate_returnval(self, current_image, use_last_active_card=None):
-        if use_last_active_card:
-            last_active_card = use_last_active_card
-        else:
-            last_active_card = self.last_active_card
-        current_image_tags = self.canvas.gettags(current_image)
-
-        current_image_bbox = self.canvas.bbox(current_image)
-        bbox_list = list(current_image_bbox)
-        current_image_overlapping = self.canvas.find_overlapping(*bbox_list)
-
-        tag_a = str(current_image_tags).replace(", 'current')", "").replace(")", "").replace(
-            "('", "").replace("', 'face_down'", "").replace("', 'face_up'", "")
-        overlapping = False
-        ace_slot = False
-        returnval = False
-
-        over_ace_slot = False
-        for card in self.canvas.find_overlapping(*self.canvas.bbox(current_image)):
-            if "empty_ace_slot" in self.canvas.gettags(card):
-                over_ace_slot = True
-                break
-        if (not over_ace_slot) and ("empty_slot" not in str(current_image_tags)):
-            csl = list(self.canvas.bbox(current_image))
-            csl[1] = (int(csl[1])) + 135
-            csl[3] = (int(csl[3])) + 20
-            csl = tuple(csl)
-            csl = list(self.canvas.find_overlapping(*csl))
-            for card in csl:
-                if card in self.card_stack_list:
-                    continue
-                elif "face_up" in self.canvas.gettags(card):
-
-                    overlapping = True
-                    break
-
-        if "empty_slot" in str(current_image_tags):
-            if "king" in last_active_card:
-                for card in current_image_overlapping:
-                    if card in self.card_stack_list:
-                        continue
-                    elif "face" in str(self.canvas.gettags(card)):
-                        overlapping = True
-                        break
-
-        for item in current_image_overlapping:
-            if "empty_ace_slot" in self.canvas.gettags(self.canvas.find_withtag(item)):
-                ace_slot = True
-
-        if ace_slot:
-            try:
-                for item in self.card_stack_list:
-                    self.canvas.tag_raise(item)
-                item = self.canvas.find_overlapping(*self.canvas.bbox(self.canvas.find_above(last_active_card)))
-                overlapping = True
-            except:
-                pass
-
-        if "ace" not in last_active_card and "empty_ace_slot" in current_image_tags:
-            return returnval
-        elif "king" not in last_active_card and "empty_slot" in current_image_tags:
-            return returnval
-        elif "empty_slot" in last_active_card:
-            return returnval
-        elif overlapping:
-            return returnval
-        elif "king" in last_active_card and "empty_slot" in current_image_tags:
-            returnval = True
-            return returnval
-        elif self.check_move_validity(tag_a, last_active_card, ace_slot):
-            returnval = True
-            return returnval
-        else:
-            return returnval
-
-    def card_onclick(self, event):
-        self.initiate_game()
-        self.current_image = current_image = self.canvas.find_withtag("current")
-        self.current_image_tags = current_image_tags = self.canvas.gettags(current_image)
-        self.current_image_location = self.canvas.coords(current_image)
-        self.current_image_bbox = current_image_bbox = self.canvas.bbox(current_image)
-        bbox_list = list(current_image_bbox)
-        current_image_overlapping = self.canvas.find_overlapping(*bbox_list)
-        self.tag_a = tag_a = str(current_image_tags).replace(", 'current')", "").replace(
-            "('", "").replace("', 'face_down'", "").replace("', 'face_up'", "")
-        overlapping = False
-        ace_slot = False
-        if self.last_active_card != "":
-            if "empty_ace_slot" not in str(current_image_tags) and "empty_slot" not in str(current_image_tags):
-                csl = list(self.canvas.bbox(tag_a))
-                csl[1] = (int(csl[1])) + 135
-                csl[3] = (int(csl[3])) + 20
-                csl = tuple(csl)
-                csl = list(self.canvas.find_overlapping(*csl))
-                for i in csl:
-                    if "face_up" in self.canvas.gettags(self.canvas.find_withtag(i)):
-                        overlapping = True
-
-            for item in current_image_overlapping:
-                if "empty_ace_slot" in self.canvas.gettags(self.canvas.find_withtag(item)):
-                    ace_slot = True
-
-            if ace_slot:
-                try:
-                    for item in self.card_stack_list:
-                        self.canvas.tag_raise(item)
-                    item = self.canvas.find_overlapping(*self.canvas.bbox(self.canvas.find_above(self.last_active_card)))
-                    overlapping = True
-                except:
-                    pass
-                self.canvas.tag_raise("rect")
-
-            try:
-                for card in self.canvas.find_overlapping(*self.canvas.bbox(self.tag_a)):
-                    if "empty_cardstack" in str(self.canvas.gettags(card)):
-                        overlapping = True
-            except:
-                pass
-            if "ace" not in self.last_active_card and "empty_ace_slot" in current_image_tags:
-                if event != "send_cards_to_ace":
-                    self.end_onclick(event=event)
-            elif "king" not in self.last_active_card and "empty_slot" in current_image_tags:
-                if event != "send_cards_to_ace":
-                    self.end_onclick(event=event)
-            elif "empty_slot" in self.last_active_card:
-                if event != "send_cards_to_ace":
-                    self.end_onclick(event=event)
-            elif overlapping is True:
-                if event != "send_cards_to_ace":
-                    self.end_onclick(event=event)
-            elif "king" in self.last_active_card and "empty_slot" in current_image_tags:
-                self.continue_onclick(ace_slot=ace_slot, event=event)
-            elif self.check_move_validity(tag_a, self.last_active_card, ace_slot) is True:
-                if event == "send_cards_to_ace":
-                    self.create_rectangle(
-                        *self.canvas.bbox(self.last_active_card), fill="blue", tag="cardsender_highlight", alpha=.5)
-                    self.canvas.tag_raise("cardsender_highlight")
-                    self.update_idletasks()
-                    self.canvas.after(self.wait_before_send)
-                    self.update_idletasks()
-                self.continue_onclick(ace_slot=ace_slot, event=event)
-            else:
-                if event != "send_cards_to_ace":
-                    self.end_onclick(event=event)
-        else:
-            if event != "send_cards_to_ace":
-                self.end_onclick(event=event)
-
-    def end_onclick(self, event, current_tag_name="current", pass_variable_updates=False):
-        self.initiate_game()
-        self.canvas.tag_unbind("face_up", "<Enter>")
-        self.canvas.tag_unbind("card_below_rect", "<Enter>")
-        self.canvas.dtag("card_below_rect")
-        self.current_image = current_image = self.canvas.find_withtag(current_tag_name)[0]
-        self.current_image_tags = current_image_tags = self.canvas.gettags(current_image)
-        self.current_image_location = self.canvas.coords(current_image)
-        self.current_image_bbox = self.canvas.bbox(current_image)
-        self.tag_a = current_image_tags[0]
-
-        if ("empty_ace_slot" not in self.current_image_tags and "empty_slot" not in self.current_image_tags) or pass_variable_updates:
-            self.card_stack_list = ""
-            self.canvas.delete("rect")
-            self.last_active_card = ""
-            self.last_active_card = self.tag_a
-            self.card_stack_list = list(self.canvas.bbox(self.last_active_card))
-            self.card_stack_list[1] = (int(self.card_stack_list[1])) + 129
-            self.card_stack_list[3] = (int(self.card_stack_list[3])) + 350
-            self.card_stack_list = tuple(self.card_stack_list)
-            self.card_stack_list = list(self.canvas.find_overlapping(*self.card_stack_list))
-
-            if self.movetype == "Перетаскивание":
-                if event != "send_cards_to_ace":
-                    self.canvas.config(cursor="fleur")
-                for card in self.card_stack_list:
-                    card_tag = self.canvas.gettags(card)
-                    if "cardstack" in str(card_tag):
-                        to_be_card_stack_list = self.card_stack_list[-1]
-                        self.card_stack_list = []
-                        self.card_stack_list.append(to_be_card_stack_list)
-                        break
-                    elif "ace_slot" in str(card_tag):
-                        self.card_stack_list = []
-                        for card in self.canvas.find_withtag(self.last_active_card):
-                            self.card_stack_list.append(card)
-                        break
-            last_active_card_bbox_list = list(self.canvas.bbox(self.last_active_card))
-            last_active_card_bbox_list[1] = int(last_active_card_bbox_list[1]) + 90
-            last_active_card_bbox_list[3] = int(last_active_card_bbox_list[3]) - 25
-            last_active_card_bbox_list = tuple(last_active_card_bbox_list)
-            self.last_active_card_overlapping = self.canvas.find_overlapping(*last_active_card_bbox_list)
-            self.last_active_card_over = self.canvas.find_overlapping(*self.canvas.bbox(self.last_active_card))
-            self.last_active_card_coordinates = []
-            for card in self.card_stack_list:
-                self.last_active_card_coordinates.append(self.canvas.coords(card))
-
-            if self.movetype != "Перетаскивание" and event != "send_cards_to_ace":
-                first_item = list(self.canvas.bbox(self.last_active_card))
-                last_item = list(self.canvas.bbox(self.canvas.find_withtag(self.card_stack_list[-1])))
-                tl = first_item[0]
-                tr = first_item[1]
-                bl = last_item[2]
-                br = last_item[3]
-                positionsb = []
-                positionsb.append(tl)
-                positionsb.append(tr)
-                positionsb.append(bl)
-                positionsb.append(br)
-                positionsb = tuple(positionsb)
-                positions = self.canvas.bbox(self.last_active_card)
-                returnval = False
-                for item in self.card_stack_list:
-                    if "empty_ace_slot" in self.canvas.gettags(self.canvas.find_withtag(item)):
-                        returnval = True
-                        break
-                if returnval is True:
-                    self.create_rectangle(*positions, fill="blue", alpha=.3)
-                else:
-                    self.create_rectangle(*positionsb, fill="blue", alpha=.3)
-                if self.movetype == "Клик":
-                    self.canvas.tag_bind(
-                        "rect", "<Button-1>", self.click_on_rect)
-
+        pile, index = self.selected
+        target = self.drop_target if dragged else None
+        self.drop_targets = []
+        self.drop_target = None
+        if dragged:
+            self.registry.unplace(*self.game.piles[pile][index:])
+        self.clear_selection()
+        if target is None or not self.try_move(pile, target, len(self.game.piles[pile]) - index):
+            self.render(pile)
 
     def click_on_hint_rect(self, event):
-        try:
-            below_last = self.canvas.find_overlapping(*self.canvas.bbox("current"))
-        except:
-            return
-        last_card_index_in_below = below_last.index(
-            list(self.canvas.find_withtag("current"))[0])
-        below_last = (below_last[last_card_index_in_below - 1])
-        if "empty_cardstack_slot" in self.canvas.gettags(below_last):
-            self.refill_card_stack(event="hint")
-        else:
-            returnval = False
-            for card in self.canvas.find_overlapping(*self.canvas.bbox(below_last)):
-                if "empty_cardstack_slot" in self.canvas.gettags(card):
-                    self.canvas.delete("rect")
-                    self.stack_onclick(event="hint")
-                    returnval = True
-                    break
-            if not returnval:
-                self.canvas.tag_bind("face_up", "<Enter>", self.end_onclick)
+        move = self.hint_move
         self.canvas.tag_unbind("rect", "<Enter>")
         self.canvas.tag_unbind("rect", "<Leave>")
         self.canvas.tag_unbind("rect", "<Button-1>")
-        self.canvas.delete("rect")
+        self.clear_selection()
+        if move is None:
+            return
+        if STOCK in move[:2]:
+            if self.game.can_draw():
+                self.stack_onclick()
+            else:
+                self.refill_card_stack()
+        else:
+            self.card_onclick(event)
 
     def click_on_rect(self, event):
-        self.canvas.tag_bind("face_up", "<Enter>", self.end_onclick)
-        self.canvas.delete("rect")
+        self.clear_selection()
 
     def enter_on_hint_rect(self, event):
         self.canvas.tag_unbind("rect", "<Enter>")
-        self.canvas.delete("rect")
-
-    def continue_onclick(self, ace_slot, event):
-        self.update_idletasks()
-        self.cardsender_may_continue = True
-        if event != "redo":
-            self.redo = []
-        self.canvas.delete("rect")
-        tag_list = []
-        new_card_on_ace = 0
-        self.card_drawing_count = 20
-
-        for i in self.last_active_card_overlapping:
-            tag_list.append(self.canvas.gettags(i))
-            
-        if "empty_ace_slot" in str(tag_list):
-            self.cards_on_ace -= 1
-            self.points_label["text"] = (f"Очки: {(self.cards_on_ace * self.point_increment) + self.starting_points}")
-            new_card_on_ace = 2
-            check = self.generate_drawing_count(ace_slot=ace_slot)
-            if self.movetype == "Перетаскивание":
-                self.card_drawing_count = 20
-                for i in self.canvas.find_overlapping(*self.canvas.bbox(self.current_image)):
-                    tag_list.append(self.canvas.gettags(i))
-                if "empty_ace_slot" in str(tag_list):
-                    check = self.generate_drawing_count(ace_slot=ace_slot)
-                    if check != None:
-                        new_card_on_ace = check
-        else:
-            check = self.generate_drawing_count(ace_slot=ace_slot)
-            if check != None:
-                new_card_on_ace = check
-
-        last_active_card_bbox_list = list(self.canvas.bbox(self.last_active_card))
-        last_active_card_bbox_list[1] = int(last_active_card_bbox_list[1]) + 60
-        last_active_card_bbox_list[3] = int(last_active_card_bbox_list[3]) - 25
-        last_active_card_bbox_list = tuple(last_active_card_bbox_list)
-
-        secondreturnval = False
-        empty_ace_slot_found = False
-        for i in list(self.last_active_card_overlapping):
-            if "empty_ace_slot" in self.canvas.gettags(self.canvas.find_withtag(i)):
-                secondreturnval = True
-                empty_ace_slot_found = i
-                break
-            elif "empty_cardstack_slotb" in self.canvas.gettags(self.canvas.find_withtag(i)):
-                secondreturnval = True
-                break
-            
-        if secondreturnval:
-            last_active_card = self.canvas.find_withtag(self.last_active_card)
-            last_active_card_coordinates = self.canvas.coords(last_active_card)
-            xpos = int(self.current_image_location[0]) - int(last_active_card_coordinates[0])
-            ypos = self.card_drawing_count + (int(self.current_image_location[1]) - int(last_active_card_coordinates[1]))
-            self.canvas.move(last_active_card, xpos, ypos)
-            self.canvas.tag_raise(last_active_card)
-            if event == "send_cards_to_ace":
-                self.canvas.tag_raise("cardsender_highlight")
-                self.card_moved_to_ace_by_sender += 1
-            if self.movetype != "Перетаскивание":
-                history_to_add = ["move_card_srv", empty_ace_slot_found, new_card_on_ace,
-                                  self.last_active_card, last_active_card_coordinates, self.tag_a]
-            else:
-                history_to_add = ["move_card_srv", empty_ace_slot_found, new_card_on_ace, self.last_active_card,
-                                  self.last_active_card_coordinates[0], self.current_image]
-        else:
-            flipped_cards = []
-            moved_cards = {}
-            for card in list(self.last_active_card_overlapping):
-                card_values = self.canvas.find_withtag(card)
-                if "face_down" in self.canvas.gettags(card_values):
-                    card_tags = str(self.canvas.gettags(card_values))
-                    tag_a = card_tags.replace("('", "").replace("', 'face_down')", "").replace("', 'face_up')", "")
-                    self.canvas.itemconfig(card_values, image=self.dict_of_cards[tag_a],
-                                           tag=(tag_a, "face_up"))
-                    if self.movetype == "Клик":
-                        self.canvas.tag_bind(
-                            tag_a, "<Button-1>", self.card_onclick)
-                    else:
-                        self.canvas.tag_bind(
-                            tag_a, "<Button-1>", self.end_onclick)
-                        self.canvas.tag_bind(
-                            tag_a, "<Button1-Motion>", self.move_card)
-                        self.canvas.tag_bind(
-                            tag_a, "<ButtonRelease-1>", self.drop_card)
-                        self.canvas.tag_bind(
-                            tag_a, "<Enter>", self.on_draggable_card)
-                        self.canvas.tag_bind(
-                            tag_a, "<Leave>", self.leave_draggable_card)
-                    flipped_cards.append(tag_a)
-            for card in list(self.card_stack_list):
-                if "face_up" in self.canvas.gettags(self.canvas.find_withtag(card)):
-                    card_location = self.canvas.coords(card)
-                    xpos = int(self.current_image_location[0]) - int(card_location[0])
-                    ypos = self.card_drawing_count + (int(self.current_image_location[1]) - int(card_location[1]))
-                    self.canvas.move(card, xpos, ypos)
-                    self.canvas.tag_raise(card)
-                    if event == "send_cards_to_ace":
-                        self.canvas.tag_raise("cardsender_highlight")
-                        self.card_moved_to_ace_by_sender += 1
-                    self.card_drawing_count += 20
-                    moved_cards[str(self.canvas.gettags(self.canvas.find_withtag(card))).replace("('", "").replace("', 'face_down')", "").replace(
-                        "', 'face_up')", "").replace("', 'face_up', 'current')", "")] = self.last_active_card_coordinates[self.card_stack_list.index(card)]
-            history_to_add = ["move_card", new_card_on_ace, moved_cards,
-                              self.card_drawing_count, flipped_cards, self.current_image]
-        self.card_stack_list = ""
-        self.last_active_card = ""
-
-        if self.cards_on_ace == 52:
-            if self.win != None:
-                self.canvas.delete("cardsender_highlight")
-                self.win.destroy()
-                self.win = None
-                self.card_moved_to_ace_by_sender = 0
-                self.stopwatch.freeze(True)
-            self.history = []
-            self.cardsender_may_continue = False
-            after_game = messagebox.askyesno(title="Вы выиграли!", message="Сыграем еще раз?", icon="question")
-            if after_game:
-                self.new_game()
-            else:
-                self.destroy()
-                exit()
-
-        self.history.append(history_to_add)
-        self.undo_last_move_button.config(state="normal")
-        self.restart_game_button.config(state="normal")
-        self.redo_last_move_button.disable()
-        self.update_idletasks()
-
-    def generate_drawing_count(self, ace_slot):
-        ace_slots = self.canvas.find_withtag("empty_ace_slot")
-        positions_of_ace_rects = []
-        for slot in ace_slots:
-            positions_of_ace_rects.append(self.canvas.bbox(slot))
-        returnval = False
-        for i in positions_of_ace_rects:
-            if str(self.current_image_bbox) == str(i):
-                returnval = True
-        if returnval is False:
-            self.card_drawing_count = 20
-        else:
-            self.card_drawing_count = 0
-        if "king" in self.last_active_card and "empty_slot" in self.current_image_tags:
-            self.card_drawing_count = 0
-        if ace_slot:
-            self.cards_on_ace += 1
-            self.points_label["text"] = (f"Очки: {(self.cards_on_ace * self.point_increment) + self.starting_points}")
-            self.card_drawing_count = 0
-            new_card_on_ace = 1
-            self.canvas_item_hover_time += 300
-            return new_card_on_ace
+        self.clear_selection()
 
 
 class Combobox(tk.Frame):
@@ -2074,12 +1333,16 @@ class Settings(tk.Toplevel):
         show_header = settings["show_header"] == "True"
         card_back = settings["card_back"]
         canvas_color = settings["canvas_color"]
+        winnable_only = settings.setdefault("winnable_only", DEFAULT_SETTINGS["winnable_only"]) == "True"
+        reduce_motion = settings.setdefault("reduce_motion", DEFAULT_SETTINGS["reduce_motion"]) == "True"
         self.movetype_chooser_var = tk.StringVar(value=movetype)
         self.gametype_chooser_var = tk.StringVar(value=gamemode)
         self.card_back_var = tk.StringVar(value=card_back)
         self.canvas_color_var = tk.StringVar(value=canvas_color)
         self.header_button_var = tk.BooleanVar(value=show_header)
         self.footer_button_var = tk.BooleanVar(value=show_footer)
+        self.winnable_button_var = tk.BooleanVar(value=winnable_only)
+        self.motion_button_var = tk.BooleanVar(value=reduce_motion)
         self.movetype_chooser_options = ["Перетаскивание", "Клик"]
         self.gametype_chooser_options = ["Стандартный", "Тренировочный"]
         self.create_widgets()
@@ -2107,6 +1370,10 @@ class Settings(tk.Toplevel):
                                        text="Перемещение:", bg="#b0acac", fg="black")
         self.gametype_label = tk.Label(self,
                                        text="Режим игры:", bg="#b0acac", fg="black")
+        self.winnable_button = tk.Checkbutton(self,
+                                              text="Только решаемые расклады", variable=self.winnable_button_var, highlightthickness=0, anchor="w", bg="#b0acac", activebackground="#706c6c")
+        self.motion_button = tk.Checkbutton(self,
+                                            text="Без анимации", variable=self.motion_button_var, highlightthickness=0, anchor="w", bg="#b0acac", activebackground="#706c6c")
 
         self.dark_back_button = tk.Radiobutton(self, text="Темная", variable=self.card_back_var, highlightthickness=0,
                                                value="dark_back", anchor="w", bg="#b0acac", activebackground="#706c6c")
@@ -2134,10 +1401,14 @@ class Settings(tk.Toplevel):
         self.light_back_button.bind("<Enter>", self.enter_button)
         self.header_button.bind("<Enter>", self.enter_button)
         self.footer_button.bind("<Enter>", self.enter_button)
+        self.winnable_button.bind("<Enter>", self.enter_button)
+        self.motion_button.bind("<Enter>", self.enter_button)
         self.dark_back_button.bind("<Leave>", self.leave_button)
         self.light_back_button.bind("<Leave>", self.leave_button)
         self.header_button.bind("<Leave>", self.leave_button)
         self.footer_button.bind("<Leave>", self.leave_button)
+        self.winnable_button.bind("<Leave>", self.leave_button)
+        self.motion_button.bind("<Leave>", self.leave_button)
         self.save_button.bind("<Enter>", self.enter_button)
         self.reset_button.bind("<Enter>", self.enter_button)
         self.save_button.bind("<Leave>", self.leave_button)
@@ -2178,6 +1449,10 @@ class Settings(tk.Toplevel):
             row=3, column=0, columnspan=2, padx=8, pady=7,  sticky="w")
         self.gametype_chooser.grid(
             row=3, column=1, columnspan=3, padx=8, pady=7, sticky="ew")
+        self.winnable_button.grid(
+            row=4, column=0, columnspan=2, padx=8, pady=7, sticky="ew")
+        self.motion_button.grid(
+            row=4, column=2, columnspan=2, padx=8, pady=7, sticky="ew")
 
         ttk.Separator(self).grid(row=8, column=0, columnspan=4,
                                  padx=6, pady=5, sticky="ew")
@@ -2234,6 +1509,8 @@ class Settings(tk.Toplevel):
         self.color_entry.config(bg="#0d4b34", disabledbackground="#0d4b34")
         self.header_button_var.set(True)
         self.footer_button_var.set(True)
+        self.winnable_button_var.set(False)
+        self.motion_button_var.set(False)
         self.card_back_var.set("dark_back")
         self.last_gamemode = self.gametype_chooser_var.get()
 
@@ -2245,6 +1522,8 @@ class Settings(tk.Toplevel):
         settings["show_header"] = str(self.header_button_var.get())
         settings["card_back"] = str(self.card_back_var.get())
         settings["canvas_color"] = str(self.canvas_color_var.get())
+        settings["winnable_only"] = str(self.winnable_button_var.get())
+        settings["reduce_motion"] = str(self.motion_button_var.get())
         self.updated_settings = True
         with open(os.path.join("assets", "settings.json"), "w", encoding="utf-8") as handle:
             handle.write(str(settings).replace("'", '"'))
@@ -2272,6 +1551,8 @@ class Settings(tk.Toplevel):
             settings["show_header"] = str(self.header_button_var.get())
             settings["canvas_color"] = str(self.canvas_color_var.get())
             settings["card_back"] = str(self.card_back_var.get())
+            settings["winnable_only"] = str(self.winnable_button_var.get())
+            settings["reduce_motion"] = str(self.motion_button_var.get())
             if self.settings != settings:
                 save = messagebox.askyesnocancel(
                     "Сохранение настроек.", "Вы изменили настройки. Хотите сохранить их?", parent=self, default="yes", icon="warning")
@@ -2285,7 +1566,8 @@ class Settings(tk.Toplevel):
 
 
 def main():
-    window = SolitareGameWindow()
+    deal_number = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    window = SolitareGameWindow(deal_number)
     window.mainloop()
 
 
@@ -0,0 +1,112 @@
+import math
+
+from engine import FOUNDATIONS, PILE_COUNT, STOCK, TABLEAU, WASTE
+
+# the board at scale 1, which is what the smallest window shows; bigger
+# windows scale everything up in steps of 1 / SCALE_STEPS and centre the board
+CARD_WIDTH = 100
+CARD_HEIGHT = 130
+BOARD_WIDTH = 1300
+BOARD_HEIGHT = 660
+SCALE_STEPS = 20
+TOP = 50
+STOCK_X = 51
+WASTE_X = 166
+FOUNDATION_X = 525
+FOUNDATION_STEP = 140
+TABLEAU_X = 295
+TABLEAU_STEP = 130
+TABLEAU_SLOT_Y = 250
+TABLEAU_Y = 270
+FAN = 20
+MIN_FAN = 4
+BOTTOM_MARGIN = 10
+
+
+class Layout:
+    # canvas coordinates of every pile and card, computed from (pile, index)
+    # and the canvas size alone; nothing here reads the canvas back. long
+    # tableau columns are squeezed so they always fit above the bottom edge
+
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        self.width = self.height = None
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        # returns whether anything moved
+        if (width, height) == (self.width, self.height):
+            return False
+        self.width = width
+        self.height = height
+        # the window's minimum size fits the board at scale 1
+        scale = min(width / BOARD_WIDTH, height / BOARD_HEIGHT)
+        self.scale = max(1.0, math.floor(scale * SCALE_STEPS) / SCALE_STEPS)
+        self.card_size = self.px(CARD_WIDTH), self.px(CARD_HEIGHT)
+        self.left = max(0, (width - self.px(BOARD_WIDTH)) // 2)
+        return True
+
+    def px(self, value):
+        return round(value * self.scale)
+
+    def fan(self, count):
+        # vertical step between the cards of a tableau column of count cards
+        fan = self.px(FAN)
+        if count < 2:
+            return fan
+        room = self.height - self.px(BOTTOM_MARGIN) - self.px(TABLEAU_Y) - self.card_size[1]
+        return max(self.px(MIN_FAN), min(fan, room // (count - 1)))
+
+    def slot_position(self, pile):
+        if pile == STOCK:
+            return self.left + self.px(STOCK_X), self.px(TOP)
+        if pile == WASTE:
+            return self.left + self.px(WASTE_X), self.px(TOP)
+        if pile in FOUNDATIONS:
+            return (self.left + self.px(FOUNDATION_X + (pile - FOUNDATIONS[0]) * FOUNDATION_STEP),
+                    self.px(TOP))
+        return self.left + self.px(TABLEAU_X + (pile - TABLEAU[0]) * TABLEAU_STEP), self.px(TABLEAU_SLOT_Y)
+
+    def card_position(self, pile, index=0, count=1):
+        x, y = self.slot_position(pile)
+        if pile in TABLEAU:
+            return x, self.px(TABLEAU_Y) + index * self.fan(count)
+        return x, y
+
+    def card_bbox(self, pile, index=0, count=1):
+        x, y = self.card_position(pile, index, count)
+        return x, y, x + self.card_size[0], y + self.card_size[1]
+
+    def slot_bbox(self, pile):
+        x, y = self.slot_position(pile)
+        return x, y, x + self.card_size[0], y + self.card_size[1]
+
+    def outline_bbox(self, pile):
+        # the rounded outline drawn in the empty stock and waste slots
+        x, y = self.slot_position(pile)
+        if pile == STOCK:
+            return x + self.px(1), y + self.px(2), x + self.px(98), y + self.px(128)
+        return x, y + self.px(2), x + self.px(93), y + self.px(128)
+
+    def pile_bbox(self, pile, count):
+        if count:
+            return self.card_bbox(pile, count - 1, count)
+        return self.slot_bbox(pile)
+
+    def run_bbox(self, pile, index, count):
+        x1, y1, x2, y2 = self.card_bbox(pile, index, count)
+        return x1, y1, x2, self.pile_bbox(pile, count)[3]
+
+    def pile_at(self, x, y, counts):
+        # (pile, index) of the card under the point, (pile, None) for an
+        # empty slot, or None; counts holds the size of every pile
+        for pile in range(PILE_COUNT):
+            count = counts[pile]
+            first = 0 if pile in TABLEAU else max(0, count - 1)
+            for index in range(count - 1, first - 1, -1):
+                x1, y1, x2, y2 = self.card_bbox(pile, index, count)
+                if x1 <= x <= x2 and y1 <= y <= y2:
+                    return pile, index
+            x1, y1, x2, y2 = self.slot_bbox(pile)
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                return pile, None
+        return None
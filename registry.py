@@ -0,0 +1,40 @@
+from engine import DECK
+
+
+class CardRegistry:
+    # what the canvas shows for every card: its item id and the position
+    # and face it was last drawn with, so redraws touch only what changed
+    # and handlers never have to ask Tk
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.items = [None] * len(DECK)
+        self.positions = [None] * len(DECK)
+        self.faces = [None] * len(DECK)
+
+    def add(self, card, item):
+        self.items[card] = item
+        self.positions[card] = None
+        self.faces[card] = None
+
+    def update(self, card, position, face):
+        # records where card is drawn now; returns whether it moved and
+        # whether it turned over
+        moved = self.positions[card] != position
+        turned = self.faces[card] != face
+        self.positions[card] = position
+        self.faces[card] = face
+        return moved, turned
+
+    def invalidate(self):
+        # everything has to be drawn afresh, as after the card size changed
+        self.positions = [None] * len(DECK)
+        self.faces = [None] * len(DECK)
+
+    def unplace(self, *cards):
+        # the cards were moved on the canvas behind the registry's back, as
+        # while dragging, and have to be put back on the next redraw
+        for card in cards:
+            self.positions[card] = None
@@ -0,0 +1,92 @@
+import argparse
+import json
+import sys
+import time
+from collections import namedtuple
+
+from engine import KlondikeGame, shuffled_deck
+from journal import load_journal
+
+# headless replay of a dealt game: no canvas, no Tk, just the engine
+
+ReplayResult = namedtuple("ReplayResult", ["game", "records", "timings", "elapsed"])
+
+
+def replay_moves(deal_number, moves, total_redeals=None, timed=False):
+    # validates every move against a fresh deal and returns the final game,
+    # the move records and, when timed, the seconds spent on each move
+    game = KlondikeGame(shuffled_deck(deal_number), total_redeals)
+    timings = [] if timed else None
+    start = time.perf_counter()
+    records = game.apply_many(moves, timings)
+    return ReplayResult(game, records, timings, time.perf_counter() - start)
+
+
+def load_moves(path):
+    with open(path, encoding="utf-8") as handle:
+        moves = json.load(handle)
+    if not isinstance(moves, list) or not all(isinstance(move, list) and len(move) == 3 for move in moves):
+        raise ValueError(f"{path} is not a list of [src, dst, count]")
+    return [tuple(move) for move in moves]
+
+
+def journal_moves(events):
+    # net move list of a journal: undone moves drop out, redone ones come back
+    history = []
+    redo = []
+    for event in events:
+        kind = event[0]
+        if kind == "m":
+            history.append(tuple(event[1:4]))
+            redo = []
+        elif kind == "u":
+            redo.append(history.pop())
+        elif kind == "r":
+            history.append(redo.pop())
+    return history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a Klondike game without the UI.")
+    parser.add_argument("--journal", default=None, help="journal of a game in progress")
+    parser.add_argument("--deal", type=int, default=None, help="deal number, with --moves")
+    parser.add_argument("--moves", default=None, help="JSON file with a list of [src, dst, count]")
+    parser.add_argument("--redeals", default="3", help='redeals per game or "unlimited"')
+    parser.add_argument("--timings", action="store_true", help="time every move")
+    args = parser.parse_args(argv)
+
+    if args.journal is not None:
+        saved = load_journal(args.journal)
+        if saved is None:
+            parser.error(f"no journal in {args.journal}")
+        header, events = saved
+        deal_number, total_redeals = header["deal"], header["redeals"]
+        moves = journal_moves(events)
+    elif args.deal is not None and args.moves is not None:
+        deal_number = args.deal
+        total_redeals = None if args.redeals == "unlimited" else int(args.redeals)
+        moves = None
+    else:
+        parser.error("either --journal or --deal and --moves are required")
+
+    try:
+        if moves is None:
+            moves = load_moves(args.moves)
+        result = replay_moves(deal_number, moves, total_redeals, args.timings)
+    except (OSError, ValueError) as error:
+        print(f"deal {deal_number}: {error}", file=sys.stderr)
+        return 1
+    game = result.game
+    rate = len(moves) / result.elapsed if result.elapsed else 0
+    print(f"deal {deal_number}: {len(moves)} moves, score {game.score}, "
+          f"{game.cards_on_foundations} cards up, {'won' if game.won else 'not won'}")
+    print(f"{result.elapsed * 1000:.2f} ms, {rate:,.0f} moves/s")
+    if result.timings:
+        slowest = max(range(len(result.timings)), key=result.timings.__getitem__)
+        print(f"mean {sum(result.timings) / len(result.timings) * 1e6:.2f} us, "
+              f"slowest #{slowest} {result.timings[slowest] * 1e6:.2f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
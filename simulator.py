@@ -0,0 +1,296 @@
+import numpy as np
+
+from engine import (COLOR, DECK, EMPTY, FOUNDATIONS, PILE_COUNT, RANK, SOURCES, STOCK, SUIT, TABLEAU,
+                    TABLEAU_MOVES, TARGETS, WASTE, shuffled_deck)
+
+# no pile ever holds more than the 24 cards of the stock
+DEPTH = 24
+
+# action 0 draws or redeals, the rest are (source, target) pairs; the number
+# of cards to move is implied by the position, as in KlondikeGame.movable_count
+ACTION_SRC = np.array([STOCK] + [src for src in SOURCES for dst in TARGETS])
+ACTION_DST = np.array([WASTE] + [dst for src in SOURCES for dst in TARGETS])
+ACTIONS = len(ACTION_SRC)
+
+RANKS = np.array(RANK + [0], dtype=np.int16)
+SUITS = np.array(SUIT + [0], dtype=np.int16)
+COLORS = np.array(COLOR + [0], dtype=np.int16)
+# [card] -> which foundation slot it belongs to
+SUIT_SLOTS = np.zeros((53, len(FOUNDATIONS)), dtype=bool)
+SUIT_SLOTS[DECK, SUIT] = True
+# flattened [card * 53 + card below], with a row for an empty source
+TABLEAU_TABLE = np.zeros((53, 53), dtype=bool)
+TABLEAU_TABLE[:52] = TABLEAU_MOVES
+TABLEAU_TABLE = TABLEAU_TABLE.ravel()
+OTHER_COLUMN = ~np.eye(len(TABLEAU), dtype=bool)
+TABLEAU_PILES = np.array(TABLEAU)
+FOUNDATION_PILES = np.array(FOUNDATIONS)
+IS_FOUNDATION = np.isin(np.arange(PILE_COUNT), FOUNDATIONS)
+
+
+def deal_layout():
+    # deck index of every dealt card as (pile, position)
+    layout = []
+    count = 0
+    for column, pile in enumerate(TABLEAU):
+        for index in range(column + 1):
+            layout.append((pile, index))
+        count += column + 1
+    for index in range(52 - count):
+        layout.append((STOCK, index))
+    return np.array(layout).T
+
+
+DEAL_PILES, DEAL_INDEXES = deal_layout()
+
+
+class BatchSimulator:
+    def __init__(self, decks, total_redeals=None):
+        decks = np.asarray(decks, dtype=np.int8)
+        self.size = size = len(decks)
+        self.total_redeals = total_redeals
+        self.games = np.arange(size)
+        self.piles = np.full((size, PILE_COUNT, DEPTH), EMPTY, dtype=np.int8)
+        self.piles[:, DEAL_PILES, DEAL_INDEXES] = decks
+        self.lengths = np.zeros((size, PILE_COUNT), dtype=np.int16)
+        self.lengths[:, TABLEAU_PILES] = np.arange(1, 8)
+        self.lengths[:, STOCK] = 24
+        self.face_down = np.zeros((size, PILE_COUNT), dtype=np.int16)
+        self.face_down[:, TABLEAU_PILES] = np.arange(7)
+        self.redeals_used = np.zeros(size, dtype=np.int64)
+
+    @classmethod
+    def from_seeds(cls, seeds, total_redeals=None):
+        return cls([shuffled_deck(seed) for seed in seeds], total_redeals)
+
+    @classmethod
+    def from_game(cls, game, count=1):
+        # count copies of the position of a KlondikeGame
+        piles = np.full((PILE_COUNT, DEPTH), EMPTY, dtype=np.int8)
+        for pile, cards in enumerate(game.piles):
+            piles[pile, :len(cards)] = cards
+        simulator = cls.__new__(cls)
+        simulator.size = count
+        simulator.total_redeals = game.total_redeals
+        simulator.games = np.arange(count)
+        simulator.piles = np.repeat(piles[None], count, axis=0)
+        simulator.lengths = np.tile(np.array([len(cards) for cards in game.piles], dtype=np.int16), (count, 1))
+        simulator.face_down = np.tile(np.array(game.face_down, dtype=np.int16), (count, 1))
+        simulator.redeals_used = np.full(count, game.redeals_used, dtype=np.int64)
+        return simulator
+
+    @property
+    def cards_on_foundations(self):
+        return self.lengths[:, FOUNDATION_PILES].sum(axis=1)
+
+    @property
+    def won(self):
+        return self.cards_on_foundations == 52
+
+    def tops(self):
+        index = np.maximum(self.lengths - 1, 0)[:, :, None]
+        tops = np.take_along_axis(self.piles, index, axis=2)[:, :, 0].astype(np.int16)
+        tops[self.lengths == 0] = EMPTY
+        return tops
+
+    def can_redeal(self):
+        allowed = True if self.total_redeals is None else self.redeals_used < self.total_redeals - 1
+        return (self.lengths[:, STOCK] == 0) & (self.lengths[:, WASTE] > 0) & allowed
+
+    def legal_moves(self):
+        # returns (legal, counts), both shaped (games, ACTIONS)
+        size = self.size
+        tops = self.tops()
+        lengths = self.lengths
+        legal = np.empty((size, ACTIONS), dtype=bool)
+        pairs = legal[:, 1:].reshape(size, len(SOURCES), len(TARGETS))
+
+        # any source to its suit's foundation
+        source_tops = tops[:, SOURCES]
+        suits = SUITS[source_tops]
+        foundation_lengths = np.take_along_axis(lengths[:, FOUNDATION_PILES], suits, axis=1)
+        playable = (source_tops != EMPTY) & (RANKS[source_tops] == foundation_lengths + 1)
+        pairs[:, :, :len(FOUNDATIONS)] = playable[:, :, None] & SUIT_SLOTS[source_tops]
+
+        # waste and foundation tops onto the tableau
+        tableau_tops = tops[:, TABLEAU_PILES]
+        singles = len(SOURCES) - len(TABLEAU)
+        pairs[:, :singles, len(FOUNDATIONS):] = TABLEAU_TABLE[source_tops[:, :singles, None] * 53
+                                                              + tableau_tops[:, None, :]]
+
+        # tableau runs: the only candidate card is the one whose rank fits,
+        # and as face-up colours alternate its colour follows from the base
+        first = self.face_down[:, TABLEAU_PILES]
+        column_lengths = lengths[:, TABLEAU_PILES]
+        bases = np.take_along_axis(self.piles[:, TABLEAU_PILES], first[:, :, None], axis=2)[:, :, 0]
+        wanted = np.where(tableau_tops == EMPTY, 13, RANKS[tableau_tops] - 1)
+        index = (first + RANKS[bases])[:, :, None] - wanted[:, None, :]
+        valid = (index >= first[:, :, None]) & (index < column_lengths[:, :, None]) & OTHER_COLUMN
+        colors = COLORS[bases][:, :, None] ^ ((index - first[:, :, None]) & 1)
+        runs = valid & ((colors != COLORS[tableau_tops][:, None, :]) | (tableau_tops == EMPTY)[:, None, :])
+        pairs[:, singles:, len(FOUNDATIONS):] = runs
+        legal[:, 0] = (lengths[:, STOCK] > 0) | self.can_redeal()
+
+        # every move but a tableau run moves a single card
+        counts = legal.astype(np.int16)
+        pair_counts = counts[:, 1:].reshape(size, len(SOURCES), len(TARGETS))
+        pair_counts[:, singles:, len(FOUNDATIONS):] = (column_lengths[:, :, None] - index) * runs
+        return legal, counts
+
+    def step(self, actions, counts):
+        # actions < 0 leave a game untouched
+        games = self.games
+        active = actions >= 0
+        actions = np.where(active, actions, 0)
+        stock = active & (actions == 0)
+        draw = games[stock & (self.lengths[:, STOCK] > 0)]
+        redeal = games[stock & (self.lengths[:, STOCK] == 0)]
+        self.draw(draw)
+        self.redeal(redeal)
+        moved = games[active & (actions > 0)]
+        actions = actions[moved]
+        self.move(moved, ACTION_SRC[actions], ACTION_DST[actions], counts[moved, actions])
+
+    def draw(self, games):
+        stock = self.lengths[games, STOCK] - 1
+        waste = self.lengths[games, WASTE]
+        self.piles[games, WASTE, waste] = self.piles[games, STOCK, stock]
+        self.piles[games, STOCK, stock] = EMPTY
+        self.lengths[games, STOCK] -= 1
+        self.lengths[games, WASTE] += 1
+
+    def redeal(self, games):
+        waste = self.lengths[games, WASTE]
+        positions = np.arange(DEPTH)
+        source = np.clip(waste[:, None] - 1 - positions, 0, DEPTH - 1)
+        cards = np.take_along_axis(self.piles[games, WASTE], source, axis=1)
+        self.piles[games, STOCK] = np.where(positions < waste[:, None], cards, EMPTY)
+        self.piles[games, WASTE] = EMPTY
+        self.lengths[games, STOCK] = waste
+        self.lengths[games, WASTE] = 0
+        self.redeals_used[games] += 1
+
+    def move(self, games, src, dst, counts):
+        start = self.lengths[games, src] - counts
+        end = self.lengths[games, dst]
+        rows, offsets = np.nonzero(np.arange(13) < counts[:, None])
+        cards = self.piles[games[rows], src[rows], start[rows] + offsets]
+        self.piles[games[rows], dst[rows], end[rows] + offsets] = cards
+        self.piles[games[rows], src[rows], start[rows] + offsets] = EMPTY
+        self.lengths[games, src] = start
+        self.lengths[games, dst] = end + counts
+        flip = (start > 0) & (start == self.face_down[games, src])
+        self.face_down[games[flip], src[flip]] -= 1
+
+    def move_priorities(self, games, actions, counts):
+        # vectorised KlondikeGame.move_priority for the given (game, action)
+        # pairs
+        src = ACTION_SRC[actions]
+        dst = ACTION_DST[actions]
+        index = self.lengths[games, src] - counts
+        hidden = np.where(src >= TABLEAU[0], self.face_down[games, src], 0)
+        exposes = (hidden > 0) & (index == hidden)
+        target_empty = self.lengths[games, dst] == 0
+
+        uncovered = self.piles[games, src, np.clip(index - 1, 0, DEPTH - 1)].astype(np.int64)
+        foundation_lengths = self.lengths[games, FOUNDATION_PILES[SUITS[uncovered]]]
+        frees = (index > 0) & (RANKS[uncovered] == foundation_lengths + 1)
+
+        priorities = np.where(frees, 60, -10)
+        priorities = np.where(index == 0, np.where(target_empty, -10, 10), priorities)
+        priorities = np.where(exposes, np.where(target_empty, 70, 80) + hidden, priorities)
+        priorities = np.where(src == WASTE, 40, priorities)
+        priorities = np.where(IS_FOUNDATION[src], -20, priorities)
+        priorities = np.where(IS_FOUNDATION[dst], 100 + 20 * exposes, priorities)
+        return np.where(src == STOCK, 0, priorities)
+
+    def take(self, games):
+        simulator = BatchSimulator.__new__(BatchSimulator)
+        simulator.size = len(games)
+        simulator.total_redeals = self.total_redeals
+        simulator.games = np.arange(len(games))
+        simulator.piles = self.piles[games]
+        simulator.lengths = self.lengths[games]
+        simulator.face_down = self.face_down[games]
+        simulator.redeals_used = self.redeals_used[games]
+        return simulator
+
+    def put(self, games, simulator):
+        self.piles[games] = simulator.piles
+        self.lengths[games] = simulator.lengths
+        self.face_down[games] = simulator.face_down
+        self.redeals_used[games] = simulator.redeals_used
+
+    def run(self, policy, max_steps=1000, seed=None):
+        # plays every game until it is won, stuck or out of steps; returns
+        # (won, steps) arrays
+        rng = np.random.default_rng(seed)
+        steps = np.zeros(self.size, dtype=np.int64)
+        ids = self.games[~self.won]
+        batch = self.take(ids)
+        idle = np.zeros(len(ids), dtype=np.int64)
+        done = np.zeros(len(ids), dtype=bool)
+        for step in range(max_steps):
+            if done.all():
+                break
+            legal, counts = batch.legal_moves()
+            actions = policy(batch, legal, counts, rng)
+            # a game that goes round the whole talon without another move
+            # is stuck
+            talon = batch.lengths[:, STOCK] + batch.lengths[:, WASTE]
+            done |= (actions < 0) | (idle > talon + 1)
+            actions = np.where(done, -1, actions)
+            batch.step(actions, counts)
+            steps[ids] += ~done
+            idle = np.where(actions == 0, idle + 1, 0)
+            done |= batch.won
+            if done.sum() * 4 > len(ids):
+                # drop finished games so later steps skip them
+                self.put(ids, batch)
+                keep = ~done
+                ids = ids[keep]
+                idle = idle[keep]
+                done = done[keep]
+                batch = batch.take(np.nonzero(keep)[0])
+        self.put(ids, batch)
+        return self.won, steps
+
+
+def choose(simulator, games, actions, scores, rng):
+    # best scoring action per game among the (game, action) pairs, ties
+    # broken at random; -1 for games without any
+    chosen = np.full(simulator.size, -1)
+    if not len(games):
+        return chosen
+    keys = scores + rng.random(len(games))
+    # pairs come from nonzero, so each game's actions are one segment
+    starts = np.nonzero(np.diff(games, prepend=-1))[0]
+    best = np.maximum.reduceat(keys, starts)
+    picked = keys == np.repeat(best, np.diff(starts, append=len(games)))
+    chosen[games[picked]] = actions[picked]
+    return chosen
+
+
+def random_policy(simulator, legal, counts, rng):
+    games, actions = np.nonzero(legal)
+    return choose(simulator, games, actions, 0, rng)
+
+
+def foundation_first_policy(simulator, legal, counts, rng):
+    games, actions = np.nonzero(legal)
+    return choose(simulator, games, actions, IS_FOUNDATION[ACTION_DST[actions]], rng)
+
+
+def greedy_policy(simulator, legal, counts, rng):
+    # same choice as KlondikeGame.hint, which never plays a negative move
+    games, actions = np.nonzero(legal)
+    priorities = simulator.move_priorities(games, actions, counts[games, actions])
+    keep = priorities >= 0
+    return choose(simulator, games[keep], actions[keep], priorities[keep], rng)
+
+
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+    "foundation_first": foundation_first_policy,
+}
@@ -0,0 +1,212 @@
+import time
+
+from engine import (EMPTY, FOUNDATION_MOVES, FOUNDATIONS, STOCK, SUIT, TABLEAU,
+                    TABLEAU_MOVES, TARGETS, WASTE)
+
+WINNABLE = "winnable"
+UNWINNABLE = "unwinnable"
+UNKNOWN = "unknown"
+
+
+class SolveResult:
+    def __init__(self, outcome, moves, nodes, elapsed):
+        self.outcome = outcome
+        self.moves = moves
+        self.nodes = nodes
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"SolveResult({self.outcome}, moves={len(self.moves)}, "
+                f"nodes={self.nodes}, elapsed={self.elapsed:.3f})")
+
+
+class Solver:
+    def __init__(self, game, max_nodes=200000, time_limit=10.0, stop=None):
+        self.game = game.copy()
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        # called with the clock check; a true result gives up with UNKNOWN
+        self.stop = stop
+        self.nodes = 0
+        self.seen = {}
+        # the accepts/frees cuts skip moves that rarely help but can be
+        # needed; once one has fired, an exhausted search proves nothing and
+        # solve() searches again with them off
+        self.cuts = True
+        self.pruned = False
+
+    def reach(self):
+        # with unlimited redeals every talon card can always be reached;
+        # otherwise an extra redeal beats any stock position and an earlier
+        # position beats a later one
+        left = self.game.redeals_left
+        if left is None:
+            return 0
+        return left * 100 - len(self.game.piles[WASTE])
+
+    def visit(self):
+        # the layout key leaves out the stock position and redeals, which
+        # are compared through reach instead
+        key = self.game.layout_key
+        reach = self.reach()
+        best = self.seen.get(key)
+        if best is not None and best >= reach:
+            return False
+        self.seen[key] = reach
+        return True
+
+    def apply(self, moves):
+        # the moves were legal where they were listed, so they skip play()'s
+        # checks. the game's move index is never read here and is left
+        # stale; candidates() lists moves itself, and only for the
+        # positions that get expanded
+        return [self.game.apply(src, dst, count, reindex=False) for src, dst, count in moves]
+
+    def undo(self, records):
+        for record in reversed(records):
+            self.game.undo(record, reindex=False)
+
+    def play_safe_moves(self):
+        game = self.game
+        records = []
+        moved = True
+        while moved:
+            moved = False
+            for src in (WASTE,) + TABLEAU:
+                cards = game.piles[src]
+                if not cards:
+                    continue
+                dst = FOUNDATIONS[SUIT[cards[-1]]]
+                if game.can_place(cards[-1], dst) and game.is_safe(cards[-1]):
+                    records.append(game.apply(src, dst, 1, reindex=False))
+                    moved = True
+                    break
+        return records
+
+    def talon_cards(self):
+        # every talon card that can be brought to the top of the waste,
+        # with the draws and redeal needed to get it there
+        game = self.game
+        waste = game.piles[WASTE]
+        stock = game.piles[STOCK]
+        draw = (STOCK, WASTE, 1)
+        if waste:
+            yield [], waste[-1]
+        for count, card in enumerate(reversed(stock), 1):
+            yield [draw] * count, card
+        left = game.redeals_left
+        if len(waste) > 1 and (left is None or left > 0):
+            prefix = [draw] * len(stock) + [(WASTE, STOCK, len(waste) + len(stock))]
+            for index, card in enumerate(waste[:-1]):
+                yield prefix + [draw] * (index + 1), card
+
+    def accepts(self, card, reachable):
+        if any(TABLEAU_MOVES[other][card] for other in reachable):
+            return True
+        # or the base of a run that would uncover a face-down card
+        game = self.game
+        return any(game.face_down[pile] and TABLEAU_MOVES[game.piles[pile][game.face_down[pile]]][card]
+                   for pile in TABLEAU)
+
+    def frees(self, card, reachable):
+        foundation = self.game.piles[FOUNDATIONS[SUIT[card]]]
+        return FOUNDATION_MOVES[card][foundation[-1] if foundation else EMPTY] \
+            or self.accepts(card, reachable)
+
+    def pile_moves(self):
+        # the legal moves between piles, worked out from the piles; the
+        # waste card is left to the talon moves
+        game = self.game
+        for src in FOUNDATIONS + TABLEAU:
+            for dst in TARGETS:
+                count = game.movable_count(src, dst)
+                if count:
+                    yield src, dst, count
+
+    def candidates(self):
+        game = self.game
+        talon = list(self.talon_cards())
+        reachable = [card for steps, card in talon]
+        options = []
+        for move in self.pile_moves():
+            src, dst, count = move
+            cards = game.piles[src]
+            index = len(cards) - count
+            if src in FOUNDATIONS:
+                # only worth taking back if something can be put on it
+                if self.cuts and not self.accepts(cards[-1], reachable):
+                    self.pruned = True
+                    continue
+            elif dst in TABLEAU:
+                # a bare column gains nothing on another empty column, and
+                # splitting a run is only worth it if the card it uncovers
+                # can be played or built on
+                if index == 0 and not game.piles[dst]:
+                    continue
+                if self.cuts and index > game.face_down[src] and not self.frees(cards[index - 1], reachable):
+                    self.pruned = True
+                    continue
+            options.append((game.move_priority(move), 0, [move]))
+        for steps, card in talon:
+            redeal = any(dst == STOCK for src, dst, count in steps)
+            for dst in TARGETS:
+                if game.can_place(card, dst):
+                    if dst in FOUNDATIONS:
+                        priority = 20 if redeal else 90 if steps else 100
+                    else:
+                        priority = 1 if redeal else 5 if steps else 40
+                    options.append((priority, -len(steps), steps + [(WASTE, dst, 1)]))
+        options.sort(key=lambda option: option[:2], reverse=True)
+        return [moves for priority, cost, moves in options]
+
+    def solve(self):
+        start = time.perf_counter()
+        result = self.search(start)
+        if result is None and self.pruned:
+            # whatever budget is left goes to the search without the cuts;
+            # the positions seen with them on were only partly expanded
+            self.cuts = False
+            self.seen = {}
+            result = self.search(start)
+        if result is None:
+            result = SolveResult(UNWINNABLE, [], self.nodes, time.perf_counter() - start)
+        return result
+
+    def search(self, start):
+        # returns None once every position has been tried
+        game = self.game
+        root = self.play_safe_moves()
+        if game.won:
+            return SolveResult(WINNABLE, moves_of(root), self.nodes, time.perf_counter() - start)
+        self.visit()
+        stack = [[root, self.candidates(), 0]]
+        while stack:
+            if self.nodes >= self.max_nodes or (self.nodes & 255 == 0 and (
+                    time.perf_counter() - start > self.time_limit or self.stop is not None and self.stop())):
+                return SolveResult(UNKNOWN, [], self.nodes, time.perf_counter() - start)
+            frame = stack[-1]
+            records, moves, index = frame
+            if index == len(moves):
+                self.undo(records)
+                stack.pop()
+                continue
+            frame[2] += 1
+            self.nodes += 1
+            records = self.apply(moves[index])
+            records += self.play_safe_moves()
+            if game.won:
+                path = [record for frame in stack for record in frame[0]] + records
+                return SolveResult(WINNABLE, moves_of(path), self.nodes, time.perf_counter() - start)
+            if not self.visit():
+                self.undo(records)
+                continue
+            stack.append([records, self.candidates(), 0])
+        return None
+
+
+def moves_of(records):
+    return [record[:3] for record in records]
+
+
+def solve(game, max_nodes=200000, time_limit=10.0, stop=None):
+    return Solver(game, max_nodes, time_limit, stop).solve()
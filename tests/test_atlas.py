@@ -0,0 +1,48 @@
+import os
+
+from PIL import Image
+
+from atlas import Atlas, write_atlas
+
+NAMES = ("red", "green")
+
+
+def make_images(directory):
+    Image.new("RGBA", (3, 2), (255, 0, 0, 128)).save(os.path.join(directory, "red.png"))
+    Image.new("RGB", (2, 4), (0, 255, 0)).save(os.path.join(directory, "green.png"))
+
+
+def test_atlas_serves_the_png_pixels(tmp_path):
+    directory = str(tmp_path)
+    make_images(directory)
+    path = os.path.join(directory, "atlas.bin")
+    assert write_atlas(path, directory, NAMES) == len(NAMES)
+    atlas = Atlas(path, directory)
+    for name in NAMES:
+        with Image.open(os.path.join(directory, name + ".png")) as image:
+            expected = image.convert("RGBA")
+        image = atlas.image(name)
+        assert image.size == expected.size
+        assert image.tobytes() == expected.tobytes()
+    assert atlas.image("blue") is None
+
+
+def test_changed_png_is_not_served(tmp_path):
+    directory = str(tmp_path)
+    make_images(directory)
+    path = os.path.join(directory, "atlas.bin")
+    write_atlas(path, directory, NAMES)
+    Image.new("RGBA", (5, 5), (0, 0, 255, 255)).save(os.path.join(directory, "red.png"))
+    atlas = Atlas(path, directory)
+    assert atlas.image("red") is None
+    assert atlas.image("green") is not None
+
+
+def test_missing_or_broken_atlas_serves_nothing(tmp_path):
+    directory = str(tmp_path)
+    make_images(directory)
+    assert Atlas(os.path.join(directory, "atlas.bin"), directory).image("red") is None
+    path = os.path.join(directory, "broken.bin")
+    with open(path, "wb") as handle:
+        handle.write(b"not an atlas at all")
+    assert Atlas(path, directory).image("red") is None
@@ -0,0 +1,126 @@
+import random
+
+import pytest
+
+from engine import (CARD_BY_NAME, EMPTY, FOUNDATIONS, PILE_COUNT, SOURCES, STOCK, SUIT, TABLEAU,
+                    TARGETS, WASTE, ZOBRIST_FOUNDATION, ZOBRIST_TABLEAU, ZOBRIST_TALON, KlondikeGame)
+
+
+def deck(seed):
+    cards = list(range(52))
+    random.Random(seed).shuffle(cards)
+    return cards
+
+
+def play(game, move):
+    src, dst, count = move
+    if src == STOCK:
+        return game.draw()
+    if dst == STOCK:
+        return game.redeal()
+    return game.move(src, dst, count)
+
+
+def random_play(game, rng, steps=300):
+    # random moves with an undo now and then; yields after every step
+    history = []
+    for step in range(steps):
+        moves = game.legal_moves()
+        if history and (not moves or rng.random() < 0.2):
+            game.undo(history.pop())
+        elif moves:
+            history.append(play(game, rng.choice(moves)))
+        else:
+            return
+        yield history
+
+
+def every_move(game):
+    # what the move index should hold, found by trying every move
+    return [(src, dst, count) for src in SOURCES for dst in TARGETS for count in range(1, 14)
+            if game.can_move(src, dst, count)]
+
+
+def layout_key(game):
+    # the Zobrist key of the position, worked out from scratch
+    key = 0
+    for pile, cards in enumerate(game.piles):
+        for index, card in enumerate(cards):
+            if pile in TABLEAU:
+                under = cards[index - 1] if index else EMPTY
+                key ^= ZOBRIST_TABLEAU[index >= game.face_down[pile]][card][under]
+            elif pile in FOUNDATIONS:
+                key ^= ZOBRIST_FOUNDATION[card]
+            else:
+                key ^= ZOBRIST_TALON[card]
+    return key
+
+
+@pytest.mark.parametrize("total_redeals", [None, 3])
+def test_move_index_matches_every_legal_move(total_redeals):
+    for seed in range(20):
+        game = KlondikeGame(deck(seed), total_redeals=total_redeals)
+        for history in random_play(game, random.Random(seed)):
+            assert sorted(game.pile_moves()) == every_move(game)
+
+
+@pytest.mark.parametrize("total_redeals", [None, 3])
+def test_layout_key_matches_rebuild(total_redeals):
+    for seed in range(20):
+        game = KlondikeGame(deck(seed), total_redeals=total_redeals)
+        for history in random_play(game, random.Random(seed)):
+            assert game.layout_key == layout_key(game)
+
+
+def test_state_key_tells_talon_positions_apart():
+    game = KlondikeGame(deck(4), total_redeals=3)
+    keys = {game.state_key}
+    layout = game.layout_key
+    while game.can_draw():
+        game.draw()
+        keys.add(game.state_key)
+    game.redeal()
+    keys.add(game.state_key)
+    assert game.layout_key == layout
+    assert len(keys) == len(game.piles[STOCK]) + 2
+    assert not game.piles[WASTE]
+
+
+def test_undo_restores_deal():
+    game = KlondikeGame(deck(7), total_redeals=3)
+    start = [list(cards) for cards in game.piles], list(game.face_down), game.state_key
+    history = []
+    for history in random_play(game, random.Random(1), 200):
+        pass
+    for record in reversed(history):
+        game.undo(record)
+    assert (game.piles, game.face_down, game.state_key) == start
+
+
+def test_score_follows_move_records():
+    game = KlondikeGame(deck(3), point_increment=5, starting_points=7)
+    for history in random_play(game, random.Random(2)):
+        assert game.score == game.cards_on_foundations * 5 + 7
+        assert game.score == sum(record.score for record in history) + 7
+
+
+def foundations(*names):
+    # a game with nothing but the given cards, on their foundations
+    game = KlondikeGame(deck(0))
+    game.piles = [[] for pile in range(PILE_COUNT)]
+    for name in names:
+        card = CARD_BY_NAME[name]
+        game.piles[FOUNDATIONS[SUIT[card]]].append(card)
+    return game
+
+
+def test_is_safe_waits_for_the_other_colour():
+    assert foundations().is_safe(CARD_BY_NAME["2_of_hearts"])
+    game = foundations("ace_of_spades", "2_of_spades", "ace_of_clubs")
+    assert not game.is_safe(CARD_BY_NAME["3_of_hearts"])
+
+
+def test_is_safe_waits_for_the_other_foundation_of_its_colour():
+    black = "ace_of_spades", "2_of_spades", "ace_of_clubs", "2_of_clubs"
+    assert not foundations(*black).is_safe(CARD_BY_NAME["3_of_hearts"])
+    assert foundations(*black, "ace_of_diamonds").is_safe(CARD_BY_NAME["3_of_hearts"])
@@ -0,0 +1,69 @@
+import random
+
+from engine import KlondikeGame, shuffled_deck
+from journal import Journal, load_journal, replay
+
+DEAL = 11
+
+
+def play_session(rng, steps=250):
+    # a random session of moves, undos and redos, as the frame journals
+    # them; returns the events and the position after each of them
+    game = KlondikeGame(shuffled_deck(DEAL), total_redeals=3)
+    history = []
+    redo = []
+    events = []
+    positions = []
+    for step in range(steps):
+        moves = game.legal_moves()
+        roll = rng.random()
+        if redo and roll < 0.1:
+            history.append(game.redo(redo.pop()))
+            events.append(["r", step])
+        elif history and (roll < 0.25 or not moves):
+            record = history.pop()
+            game.undo(record)
+            redo.append(record)
+            events.append(["u", step])
+        elif moves:
+            record = game.play(*rng.choice(moves))
+            history.append(record)
+            redo = []
+            events.append(["m", record.src, record.dst, record.count, step])
+        else:
+            break
+        positions.append((game.state_key, list(history), list(redo)))
+    return events, positions
+
+
+def test_torn_journal_replays_to_last_whole_event(tmp_path):
+    events, positions = play_session(random.Random(5))
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.start({"deal": DEAL, "redeals": 3})
+    for event in events:
+        journal.append(event)
+    journal.close()
+    # a crash in the middle of writing the last event
+    with open(path, "rb+") as handle:
+        size = handle.seek(0, 2)
+        handle.truncate(size - 4)
+
+    header, saved = load_journal(path)
+    assert header == {"deal": DEAL, "redeals": 3}
+    assert saved == events[:-1]
+    game = KlondikeGame(shuffled_deck(header["deal"]), total_redeals=header["redeals"])
+    history, redo, elapsed = replay(game, saved)
+    assert (game.state_key, history, redo) == positions[-2]
+    assert elapsed == saved[-1][-1]
+
+
+def test_set_header_keeps_events(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.start({"deal": DEAL, "redeals": None}, [["m", 0, 1, 1, 0]])
+    journal.append(["u", 1])
+    journal.set_header({"deal": DEAL, "redeals": 3})
+    journal.append(["r", 2])
+    journal.close()
+    assert load_journal(path) == ({"deal": DEAL, "redeals": 3}, [["m", 0, 1, 1, 0], ["u", 1], ["r", 2]])
@@ -0,0 +1,37 @@
+from engine import PILE_COUNT, STOCK, TABLEAU
+from layout import Layout
+
+# a deal in progress: full stock, one card on a foundation, and a long
+# last column
+COUNTS = [24, 0, 1, 0, 0, 0, 1, 2, 3, 4, 5, 6, 19]
+
+
+def test_resize_reports_changes():
+    layout = Layout(1300, 700)
+    assert not layout.resize(1300, 700)
+    assert layout.resize(1600, 700)
+
+
+def test_pile_at_finds_every_visible_card():
+    layout = Layout(1300, 700)
+    for pile in range(PILE_COUNT):
+        count = COUNTS[pile]
+        if not count:
+            x1, y1, x2, y2 = layout.slot_bbox(pile)
+            assert layout.pile_at((x1 + x2) // 2, (y1 + y2) // 2, COUNTS) == (pile, None)
+            continue
+        for index in range(count) if pile in TABLEAU else [count - 1]:
+            x1, y1, x2, y2 = layout.card_bbox(pile, index, count)
+            assert layout.pile_at(x1 + 5, y1 + 2, COUNTS) == (pile, index)
+
+
+def test_long_columns_fit_above_the_bottom():
+    for height in (700, 800, 1000):
+        layout = Layout(1300, height)
+        assert layout.card_bbox(TABLEAU[-1], 18, 19)[3] <= height
+    layout = Layout(1300, 700)
+    assert layout.fan(19) < layout.fan(1)
+
+
+def test_wide_windows_centre_the_board():
+    assert Layout(1300, 700).slot_position(STOCK)[0] < Layout(1900, 700).slot_position(STOCK)[0]
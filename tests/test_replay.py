@@ -0,0 +1,51 @@
+import json
+import random
+
+from engine import KlondikeGame, shuffled_deck
+from replay import journal_moves, main, replay_moves
+
+DEAL = 21
+
+
+def random_moves(count=300):
+    game = KlondikeGame(shuffled_deck(DEAL), total_redeals=3)
+    rng = random.Random(DEAL)
+    moves = []
+    for step in range(count):
+        legal = game.legal_moves()
+        if not legal:
+            break
+        moves.append(rng.choice(legal))
+        game.play(*moves[-1])
+    return game, moves
+
+
+def test_replay_reaches_the_played_position():
+    game, moves = random_moves()
+    result = replay_moves(DEAL, moves, 3, timed=True)
+    assert result.game.state_key == game.state_key
+    assert [record[:3] for record in result.records] == moves
+    assert len(result.timings) == len(moves)
+
+
+def test_journal_moves_leave_out_undone_moves():
+    events = [["m", 0, 1, 1, 0], ["m", 1, 6, 1, 1], ["u", 2], ["m", 0, 1, 1, 3], ["u", 4], ["r", 5]]
+    assert journal_moves(events) == [(0, 1, 1), (0, 1, 1)]
+
+
+def test_illegal_move_is_reported(tmp_path, capsys):
+    game, moves = random_moves(20)
+    path = tmp_path / "moves.json"
+    path.write_text(json.dumps(moves + [[6, 6, 1]]))
+    assert main(["--deal", str(DEAL), "--moves", str(path)]) == 1
+    assert capsys.readouterr().err.startswith(f"deal {DEAL}: Illegal move #{len(moves)}")
+
+
+def test_unreadable_moves_file_is_reported(tmp_path, capsys):
+    for text in ("", "{}", "[[6, 7]]"):
+        path = tmp_path / "moves.json"
+        path.write_text(text)
+        assert main(["--deal", str(DEAL), "--moves", str(path)]) == 1
+        assert capsys.readouterr().err.startswith(f"deal {DEAL}: ")
+    assert main(["--deal", str(DEAL), "--moves", str(tmp_path / "missing.json")]) == 1
+    assert capsys.readouterr().err.startswith(f"deal {DEAL}: ")
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from engine import EMPTY, PILE_COUNT, STOCK, KlondikeGame, shuffled_deck
+from simulator import ACTION_DST, ACTION_SRC, POLICIES, BatchSimulator
+
+GAMES = 40
+STEPS = 300
+
+
+def expected_moves(game):
+    # the engine's legal moves as {action: count}
+    moves = {}
+    for src, dst, count in game.legal_moves():
+        if src == STOCK or dst == STOCK:
+            moves[0] = 1
+        else:
+            action = np.nonzero((ACTION_SRC == src) & (ACTION_DST == dst))[0][0]
+            moves[int(action)] = count
+    return moves
+
+
+@pytest.mark.parametrize("total_redeals", [None, 3])
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+def test_batch_matches_engine(total_redeals, policy):
+    simulator = BatchSimulator.from_seeds(range(GAMES), total_redeals)
+    games = [KlondikeGame(shuffled_deck(seed), total_redeals=total_redeals) for seed in range(GAMES)]
+    rng = np.random.default_rng(0)
+    for step in range(STEPS):
+        legal, counts = simulator.legal_moves()
+        for index, game in enumerate(games):
+            actions = np.nonzero(legal[index])[0]
+            assert {int(action): int(counts[index, action]) for action in actions} == expected_moves(game)
+        actions = POLICIES[policy](simulator, legal, counts, rng)
+        simulator.step(actions, counts)
+        for index, game in enumerate(games):
+            action = actions[index]
+            if action < 0:
+                continue
+            if action == 0 and game.can_draw():
+                game.draw()
+            elif action == 0:
+                game.redeal()
+            else:
+                game.move(int(ACTION_SRC[action]), int(ACTION_DST[action]), int(counts[index, action]))
+        for index, game in enumerate(games):
+            for pile in range(PILE_COUNT):
+                length = simulator.lengths[index, pile]
+                assert list(simulator.piles[index, pile, :length]) == game.piles[pile]
+                assert (simulator.piles[index, pile, length:] == EMPTY).all()
+                assert simulator.face_down[index, pile] == game.face_down[pile]
+            assert simulator.won[index] == game.won
@@ -0,0 +1,72 @@
+import random
+
+from engine import CARD_BY_NAME, DECK, RANK, STOCK, SUITS, KlondikeGame, shuffled_deck
+from solver import UNKNOWN, UNWINNABLE, WINNABLE, solve
+
+# deals the solver wins within a few thousand nodes
+QUICK_WINS = (0, 1, 4, 5)
+
+
+def deck(seed):
+    cards = list(DECK)
+    random.Random(seed).shuffle(cards)
+    return cards
+
+
+def dead_deck():
+    # a deal without a single legal move: the aces and queens lie face
+    # down, the columns end in the four twos and three kings, and no column
+    # can be emptied
+    tops = [CARD_BY_NAME[f"2_of_{suit}"] for suit in SUITS]
+    tops += [CARD_BY_NAME[f"king_of_{suit}"] for suit in SUITS[:3]]
+    hidden = [card for card in DECK if RANK[card] in (1, 12)]
+    rest = [card for card in DECK if card not in tops and card not in hidden]
+    hidden += rest[:21 - len(hidden)]
+    stock = rest[21 - 8:]
+    cards = []
+    for column in range(7):
+        cards += [hidden.pop() for row in range(column)] + [tops[column]]
+    return cards + stock
+
+
+def play(game, moves):
+    for src, dst, count in moves:
+        if src == STOCK:
+            game.draw()
+        elif dst == STOCK:
+            game.redeal()
+        else:
+            game.move(src, dst, count)
+
+
+def test_winning_lines_replay_to_a_win():
+    for seed in QUICK_WINS:
+        game = KlondikeGame(deck(seed), total_redeals=3)
+        result = solve(game, max_nodes=20000)
+        assert result.outcome == WINNABLE
+        replayed = game.copy()
+        replayed.apply_many(result.moves)
+        assert replayed.won
+        play(game, result.moves)
+        assert game.won
+
+
+def test_dead_deal_is_unwinnable():
+    for total_redeals in (None, 1):
+        game = KlondikeGame(dead_deck(), total_redeals=total_redeals)
+        assert not game.pile_moves()
+        assert solve(game, max_nodes=1000).outcome == UNWINNABLE
+
+
+def test_exhausted_single_pass_deal_is_unwinnable():
+    # the pruned search runs dry here, so the answer comes from the
+    # search without the cuts
+    game = KlondikeGame(shuffled_deck(38), total_redeals=1)
+    result = solve(game, max_nodes=100000, time_limit=60.0)
+    assert result.outcome == UNWINNABLE and result.nodes < 100000
+
+
+def test_budget_runs_out():
+    game = KlondikeGame(deck(3), total_redeals=3)
+    result = solve(game, max_nodes=10)
+    assert result.outcome == UNKNOWN and result.nodes == 10
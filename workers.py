@@ -0,0 +1,37 @@
+import multiprocessing
+import queue
+
+
+def latest(requests):
+    # waits for a request and skips to the newest one queued
+    job = requests.get()
+    while job is not None:
+        try:
+            job = requests.get_nowait()
+        except queue.Empty:
+            break
+    return job
+
+
+class Worker:
+    # a daemon process running target(requests, results, *args). target is
+    # expected to take its jobs through latest(), so a job it has not got
+    # to yet is dropped for a newer one, and to return on None
+
+    def __init__(self, target, *args):
+        self.requests = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=target, args=(self.requests, self.results) + args, daemon=True)
+        self.process.start()
+
+    def send(self, *job):
+        # the queue pickles in the background, so nothing in job may change
+        # after it is sent
+        self.requests.put(job)
+
+    def stop(self):
+        self.requests.put(None)
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()